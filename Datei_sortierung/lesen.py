@@ -1,25 +1,31 @@
 import os
-import json
+from collections import Counter
+import orjson
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-import pdfplumber
+from types import MappingProxyType
+import fitz  # PyMuPDF
 import docx
 from PIL import Image
 import pytesseract
-from pdf2image import convert_from_path
 import re
 
 # Pfad zu Tesseract OCR auf Windows
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
 
 # INPUT_DIR = r"C:\Users\jan\Downloads\WA2"  # Wird jetzt als Argument oder Eingabe verwendet
 
 # Bestimme das Verzeichnis, in dem dieses Skript liegt
 SCRIPT_DIR = Path(__file__).parent.absolute()
 # Ausgabedatei wird im gleichen Verzeichnis wie das Skript gespeichert
-OUTPUT_FILE = SCRIPT_DIR / "datei_inhalte.json"
+OUTPUT_FILE = SCRIPT_DIR / "datei_inhalte.jsonl"
 
 PDF_PAGE_LIMIT = 5
 
+# Tesseract startet pro Aufruf selbst mehrere Threads (skaliert am besten mit ~4 Kernen)
+MAX_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+
 def get_input_directory():
     """
     Fragt den Benutzer nach dem Eingabeverzeichnis oder verwendet ein Standardverzeichnis
@@ -46,40 +52,43 @@ def get_input_directory():
         print(f"Ungültige Eingabe. Verwende Standardverzeichnis: {default_dir}")
         return Path(default_dir)
 
+# Mapping für häufige fehlerhafte Zeichen in Dateinamen
+UNICODE_FIXES = MappingProxyType({
+    '├ƒ': 'ß',
+    '├ä': 'ä',
+    '├¤': 'ä',
+    '├Â': 'ö',
+    '├â': 'ö',
+    '├¶': 'ö',
+    '├£': 'ü',
+    '├╝': 'ü',
+    '├ô': 'ü',
+    '├ü': 'ü',
+    '├ƒÃ': 'Ä',
+    '├û': 'Ö',
+    '├£': 'Ü',
+    '├ƒÅ¸': 'ß',
+    '├č': 'ß',
+    '┬À': '',
+    '┬á': '',
+    '┬â': '',
+    '┬ã': '',
+    '┬ä': '',
+    '┬ø': '',
+    '─ô': 'ü',
+    'a╠ê' : 'ä',
+})
+# Längste Schlüssel zuerst, damit z.B. '├ƒÃ' vor '├ƒ' greift
+_UNICODE_FIX_RE = re.compile('|'.join(
+    map(re.escape, sorted(UNICODE_FIXES, key=len, reverse=True))
+))
+
 def clean_filename(filename):
     """
     Bereinigt Dateinamen von fehlerhaften Unicode-Zeichen
     """
-    # Mapping für häufige fehlerhafte Zeichen
-    replacements = {
-        '├ƒ': 'ß',
-        '├ä': 'ä',
-        '├¤': 'ä',
-        '├Â': 'ö',
-        '├â': 'ö',
-        '├¶': 'ö',
-        '├£': 'ü',
-        '├╝': 'ü',
-        '├ô': 'ü',
-        '├ü': 'ü',
-        '├ƒÃ': 'Ä',
-        '├û': 'Ö',
-        '├£': 'Ü',
-        '├ƒÅ¸': 'ß',
-        '├č': 'ß',
-        '┬À': '',
-        '┬á': '',
-        '┬â': '',
-        '┬ã': '',
-        '┬ä': '',
-        '┬ø': '',
-        '─ô': 'ü',
-        'a╠ê' : 'ä',
-    }
-    
-    new_name = filename
-    for bad, good in replacements.items():
-        new_name = new_name.replace(bad, good)
+    # Alle fehlerhaften Zeichenfolgen in einem Durchlauf ersetzen
+    new_name = _UNICODE_FIX_RE.sub(lambda m: UNICODE_FIXES[m.group(0)], filename)
     
     # Entferne verbleibende problematische Zeichen
     new_name = re.sub(r'[^\w\s\-\.]', '_', new_name)
@@ -89,57 +98,77 @@ def clean_filename(filename):
     
     return new_name
 
+def iter_files(directory):
+    """
+    Durchläuft ein Verzeichnis rekursiv mit os.scandir und liefert alle Dateien als DirEntry
+    (Dateityp kommt aus dem Verzeichniseintrag, kein zusätzlicher stat-Aufruf pro Datei)
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
 def rename_files(directory):
     """
     Benennt alle Dateien im Verzeichnis um
+    
+    Gibt die Anzahl der umbenannten Dateien und die Liste aller Dateien
+    (mit ihren Pfaden nach dem Umbenennen) zurück.
     """
     renamed_count = 0
+    files = []
     
-    for file_path in Path(directory).rglob("*"):
-        if file_path.is_file():
-            old_name = file_path.name
-            new_name = clean_filename(old_name)
+    for entry in list(iter_files(directory)):
+        old_name = entry.name
+        new_name = clean_filename(old_name)
+        file_path = Path(entry.path)
+        
+        if old_name != new_name:
+            new_path = file_path.parent / new_name
             
-            if old_name != new_name:
-                new_path = file_path.parent / new_name
-                
-                # Verhindere Überschreibungen
-                counter = 1
-                while new_path.exists():
-                    name_parts = new_name.rsplit('.', 1)
-                    if len(name_parts) == 2:
-                        new_path = file_path.parent / f"{name_parts[0]}_{counter}.{name_parts[1]}"
-                    else:
-                        new_path = file_path.parent / f"{new_name}_{counter}"
-                    counter += 1
-                
-                try:
-                    file_path.rename(new_path)
-                    print(f"Umbenannt: {old_name} → {new_path.name}")
-                    renamed_count += 1
-                except Exception as e:
-                    print(f"Fehler beim Umbenennen von {old_name}: {e}")
-    
-    return renamed_count
+            # Verhindere Überschreibungen
+            counter = 1
+            while new_path.exists():
+                name_parts = new_name.rsplit('.', 1)
+                if len(name_parts) == 2:
+                    new_path = file_path.parent / f"{name_parts[0]}_{counter}.{name_parts[1]}"
+                else:
+                    new_path = file_path.parent / f"{new_name}_{counter}"
+                counter += 1
+            
+            try:
+                file_path.rename(new_path)
+                print(f"Umbenannt: {old_name} → {new_path.name}")
+                renamed_count += 1
+                file_path = new_path
+            except Exception as e:
+                print(f"Fehler beim Umbenennen von {old_name}: {e}")
+        
+        files.append(file_path)
+    
+    return renamed_count, files
 
 def extract_text(file_path):
+    """
+    Extrahiert den Textinhalt einer Datei (liefert immer einen String, auch bei Fehlern)
+    """
     ext = file_path.suffix.lower()
     try:
         # PDF
         if ext == ".pdf":
             text = ""
-            with pdfplumber.open(file_path) as pdf:
-                max_pages = min(len(pdf.pages), PDF_PAGE_LIMIT)
-                for i in range(max_pages):
-                    page = pdf.pages[i]
-                    txt = page.extract_text()
+            # PDF komplett in den Speicher lesen statt vieler kleiner seek/read-Aufrufe
+            with fitz.open(stream=file_path.read_bytes(), filetype="pdf") as pdf:
+                for page in pdf.pages(0, min(pdf.page_count, PDF_PAGE_LIMIT)):
+                    txt = page.get_text("text")
                     if txt and txt.strip():
                         text += txt
                     else:
-                        # OCR, falls keine Textinhalte gefunden
-                        pil_images = convert_from_path(file_path, first_page=i+1, last_page=i+1)
-                        for img in pil_images:
-                            text += pytesseract.image_to_string(img)
+                        # OCR, falls keine Textinhalte gefunden (Seite aus bereits geöffnetem PDF rendern)
+                        img = page.get_pixmap(dpi=200).pil_image()
+                        text += pytesseract.image_to_string(img)
             return text.strip()
 
         # Word
@@ -162,6 +191,37 @@ def extract_text(file_path):
     except Exception as e:
         return f"ERROR: {e}"
 
+def _init_worker(tesseract_cmd):
+    """
+    Initialisiert einen Worker-Prozess (Tesseract-Pfad setzen)
+    """
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+def _process_one(path_str):
+    """
+    Extrahiert den Inhalt einer Datei im Worker-Prozess
+    """
+    file = Path(path_str)
+    text = extract_text(file)
+    return {
+        "filename": file.name,
+        "path": str(file),
+        "extension": file.suffix.lower(),
+        "text_preview": text[:3000]
+    }
+
+def extract_all(files):
+    """
+    Extrahiert die Inhalte aller Dateien parallel
+    
+    Liefert (Datei, Datensatz)-Paare in der Reihenfolge, in der die Worker fertig werden.
+    """
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=_init_worker,
+                             initargs=(TESSERACT_CMD,)) as executor:
+        futures = {executor.submit(_process_one, str(file)): file for file in files}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
 def main():
     print("=== DATEIINHALTE EXTRACTOR ===")
     print(f"Skript-Verzeichnis: {SCRIPT_DIR}")
@@ -180,70 +240,60 @@ def main():
     
     # SCHRITT 1: Dateinamen bereinigen
     print("\n=== SCHRITT 1: Dateinamen bereinigen ===")
-    renamed = rename_files(INPUT_DIR)
+    renamed, files = rename_files(INPUT_DIR)
     print(f"\n{renamed} Dateien umbenannt.\n")
     
     # SCHRITT 2: Dateien extrahieren
     print("=== SCHRITT 2: Dateiinhalte extrahieren ===")
-    data = []
     
-    # Dateitypen zählen
-    file_types = {}
-    processed_count = 0
+    # Dateitypen zählen (vorab, damit die Metadaten als erste Zeile geschrieben werden können)
+    file_types = Counter(file.suffix.lower() for file in files)
     
-    for file in Path(INPUT_DIR).rglob("*"):
-        if file.is_file():
-            processed_count += 1
-            file_ext = file.suffix.lower()
-            file_types[file_ext] = file_types.get(file_ext, 0) + 1
-            
-            print(f"Verarbeite ({processed_count}): {file.name}")
-            text = extract_text(file)
-            data.append({
-                "filename": file.name,
-                "path": str(file),
-                "extension": file_ext,
-                "text_preview": text[:3000] if isinstance(text, str) else str(text)[:3000]
-            })
-    
-    # Ergebnis speichern
+    metadata = {
+        "input_directory": str(INPUT_DIR),
+        "script_directory": str(SCRIPT_DIR),
+        "total_files": len(files),
+        "file_types": dict(file_types),
+        "processed_date": str(Path(__file__).stat().st_mtime)
+    }
+    
+    # Ausgabedatei öffnen (JSONL: Metadaten in Zeile 1, danach ein Datensatz pro Datei)
+    output_file = OUTPUT_FILE
     try:
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump({
-                "metadata": {
-                    "input_directory": str(INPUT_DIR),
-                    "script_directory": str(SCRIPT_DIR),
-                    "total_files": len(data),
-                    "file_types": file_types,
-                    "processed_date": str(Path(__file__).stat().st_mtime)
-                },
-                "files": data
-            }, f, ensure_ascii=False, indent=2)
-        
-        print(f"\n" + "=" * 50)
-        print(f"FERTIG!")
-        print(f"{len(data)} Dateien extrahiert")
-        print(f"Ausgabedatei: {OUTPUT_FILE}")
-        
-        # Zusammenfassung anzeigen
-        print("\nZusammenfassung der Dateitypen:")
-        for ext, count in file_types.items():
-            print(f"  {ext if ext else '(keine Endung)'}: {count} Dateien")
-            
-        # Dateigröße anzeigen
-        output_size = OUTPUT_FILE.stat().st_size / 1024  # Größe in KB
-        print(f"\nJSON-Dateigröße: {output_size:.2f} KB")
-        
+        out = open(output_file, "wb")
     except Exception as e:
-        print(f"\nFEHLER beim Speichern der Ausgabedatei: {e}")
+        print(f"\nFEHLER beim Öffnen der Ausgabedatei: {e}")
         # Alternative: In Skript-Verzeichnis speichern
-        alt_output = SCRIPT_DIR / "datei_inhalte_fallback.json"
+        output_file = SCRIPT_DIR / "datei_inhalte_fallback.jsonl"
         try:
-            with open(alt_output, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"Daten wurden stattdessen gespeichert in: {alt_output}")
+            out = open(output_file, "wb")
+            print(f"Daten werden stattdessen gespeichert in: {output_file}")
         except Exception as e2:
             print(f"Kritischer Fehler: Konnte Daten nicht speichern: {e2}")
+            return
+    
+    processed_count = 0
+    
+    with out:
+        out.write(orjson.dumps({"metadata": metadata}) + b"\n")
+        
+        for processed_count, (file, record) in enumerate(extract_all(files), 1):
+            print(f"Verarbeitet ({processed_count}/{len(files)}): {file.name}")
+            out.write(orjson.dumps(record) + b"\n")
+    
+    print(f"\n" + "=" * 50)
+    print(f"FERTIG!")
+    print(f"{processed_count} Dateien extrahiert")
+    print(f"Ausgabedatei: {output_file}")
+    
+    # Zusammenfassung anzeigen
+    print("\nZusammenfassung der Dateitypen:")
+    for ext, count in file_types.items():
+        print(f"  {ext if ext else '(keine Endung)'}: {count} Dateien")
+        
+    # Dateigröße anzeigen
+    output_size = output_file.stat().st_size / 1024  # Größe in KB
+    print(f"\nJSONL-Dateigröße: {output_size:.2f} KB")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
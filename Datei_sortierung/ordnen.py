@@ -1,4 +1,6 @@
-import json
+import orjson
+import os
+import errno
 import shutil
 from pathlib import Path
 import time
@@ -20,37 +22,44 @@ class FileOrganizer:
     
     def organize_files(self):
         try:
-            with open(INPUT_JSON, "r", encoding="utf-8") as f:
-                data = json.load(f)["results"]
+            with open(INPUT_JSON, "rb") as f:
+                data = orjson.loads(f.read())["results"]
             
             self.stats['total'] = len(data)
             
             print(f"Starte Sortierung von {self.stats['total']} Dateien...")
             print("-" * 50)
             
+            # Alle Kategorieordner einmalig anlegen
+            for category in {item["category"].replace("/", "-") for item in data}:
+                (Path(TARGET_BASE) / category).mkdir(parents=True, exist_ok=True)
+                self.stats['categories'][category] = 0
+            
             for item in data:
                 filename = item["filename"]
                 category = item["category"].replace("/", "-")
                 
-                # Kategorie-Statistik aktualisieren
-                if category not in self.stats['categories']:
-                    self.stats['categories'][category] = 0
-                
                 source = Path(BASE_DIR) / filename
-                target_dir = Path(TARGET_BASE) / category
+                target = Path(TARGET_BASE) / category / filename
                 
                 try:
-                    if source.exists():
-                        target_dir.mkdir(parents=True, exist_ok=True)
-                        shutil.move(str(source), str(target_dir / filename))
-                        
-                        self.stats['moved'] += 1
-                        self.stats['categories'][category] += 1
-                        print(f"✓ {filename:40} → {category:20}")
-                    else:
-                        print(f"✗ {filename:40} → NICHT GEFUNDEN")
-                        self.stats['not_found'] += 1
-                        
+                    try:
+                        # Gleiches Laufwerk: ein einzelner rename-Aufruf
+                        os.rename(source, target)
+                    except OSError as e:
+                        if e.errno != errno.EXDEV:
+                            raise
+                        # Anderes Laufwerk: kopieren + löschen
+                        shutil.move(str(source), str(target))
+                    
+                    self.stats['moved'] += 1
+                    self.stats['categories'][category] += 1
+                    print(f"✓ {filename:40} → {category:20}")
+                    
+                except FileNotFoundError:
+                    print(f"✗ {filename:40} → NICHT GEFUNDEN")
+                    self.stats['not_found'] += 1
+                    
                 except Exception as e:
                     print(f"✗ {filename:40} → FEHLER: {str(e)}")
                     self.stats['errors'] += 1
@@ -1,56 +1,199 @@
 import os
+import atexit
 import json
+import orjson
 import re
+import hashlib
+from types import MappingProxyType
 from pathlib import Path
-import pdfplumber
-from PIL import Image
+import fitz  # PyMuPDF
+from PIL import Image, ImageOps
 import pytesseract
-from pdf2image import convert_from_path
 import openai
 from datetime import datetime
 import pandas as pd
 
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
 # ============ KONFIGURATION ============
 # Pfade
 SCRIPT_DIR = Path(__file__).parent.absolute()
 INPUT_DIR = SCRIPT_DIR / "rechnungen"  # Ordner mit Rechnungen
 EXTRACTED_DATA_DIR = SCRIPT_DIR / "extracted_data"
 EXTRACTED_DATA_DIR.mkdir(exist_ok=True)
+CACHE_DIR = EXTRACTED_DATA_DIR / "cache"  # Extraktionsergebnisse nach Datei-Hash
+CACHE_DIR.mkdir(exist_ok=True)
 
 # OpenAI API (falls Sie KI verwenden möchten)
 USE_OPENAI = False  # Auf True setzen, wenn Sie OpenAI nutzen möchten
 OPENAI_API_KEY = "Ihr_API_Key_Hier"
 
 # Tesseract OCR
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+OCR_LANG = 'deu+eng'
+OCR_MAX_SIZE = 2500  # Längste Bildkante vor OCR (Handyfotos sind oft 4000px+)
+
+# ============ REGEX-MUSTER ============
+# Einmalig kompiliert, da sie pro Zeile/Produkt aufgerufen werden
+_DATE_PATTERNS = [re.compile(p) for p in (
+    r'(\d{1,2})[\.\/](\d{1,2})[\.\/](\d{2,4})',
+    r'(\d{1,2})[\.\s]+([A-Za-zäöüß]+)[\.\s]+(\d{2,4})',
+    r'(\d{1,2})[\.\-](\d{1,2})[\.\-](\d{2,4})',
+)]
+_AMOUNT_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'(\d+[,\.]\d{2})\s*[€$£]?',
+    r'[€$£]\s*(\d+[,\.]\d{2})',
+    r'SUMME[:\s]*(\d+[,\.]\d{2})',
+    r'TOTAL[:\s]*(\d+[,\.]\d{2})',
+    r'ZUZAHLEN[:\s]*(\d+[,\.]\d{2})',
+)]
+_PRICE_RE = re.compile(r'(\d+[,\.]\d{2})\s*[A-Z]?$')
+_QTY_RE = re.compile(r'^(\d+[,\.]?\d*)\s*[xX]')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_TRAILING_PRICE_RE = re.compile(r'[\d.,]+\s*[€$£]?$')
+_FILENAME_SAFE = re.compile(r'[<>:"/\\|?*]')
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+# Bekannte Geschäfte (Schlüsselwort im Text → Shopname)
+SHOP_KEYWORDS = MappingProxyType({
+    'REWE': 'REWE',
+    'EDEKA': 'EDEKA',
+    'ALDI': 'ALDI',
+    'LIDL': 'LIDL',
+    'KAUFLAND': 'KAUFLAND',
+    'NETTO': 'NETTO',
+    'PENNY': 'PENNY',
+    'DM': 'DM',
+    'ROSSMANN': 'ROSSMANN',
+    'TEGUT': 'TEGUT',
+    'BAUHAUS': 'BAUHAUS',
+    'HORNBACH': 'HORNBACH',
+    'OBIMARKT': 'OBIMARKT',
+    'BIO COMPANY': 'BIO COMPANY',
+    'DENNS': 'DENNS',
+    'ALNATURA': 'ALNATURA',
+})
+_SHOP_RE = re.compile(r'\b(' + '|'.join(
+    map(re.escape, sorted(SHOP_KEYWORDS, key=len, reverse=True))
+) + r')\b')
+# Reihenfolge in SHOP_KEYWORDS entscheidet, wenn mehrere Geschäfte im Text vorkommen
+_SHOP_PRIORITY = MappingProxyType({keyword: i for i, keyword in enumerate(SHOP_KEYWORDS)})
+
+# Häufige Fehler/Abkürzungen in Produktnamen
+PRODUCT_CORRECTIONS = MappingProxyType({
+    'KASTANE': 'KASTANIEN',
+    'KASTANIE': 'KASTANIEN',
+    'TOMAT': 'TOMATEN',
+    'GURK': 'GURKE',
+    'PAPRIK': 'PAPRIKA',
+    'ZUCCHIN': 'ZUCCHINI',
+    'AVOCAD': 'AVOCADO',
+    'BANAN': 'BANANE',
+    'APFEL': 'ÄPFEL',
+    'BROT': 'BROT',
+    'MILCH': 'MILCH',
+    'EIER': 'EIER',
+    'KAESE': 'KÄSE',
+    'BUTTER': 'BUTTER',
+    'BIO': 'BIO',
+    'ORGANIC': 'BIO',
+    'FISCH': 'FISCH',
+    'FLEISCH': 'FLEISCH',
+    'WURST': 'WURST',
+    'AUFSTRICH': 'AUFSTRICH',
+})
+_PRODUCT_CORRECTION_RE = re.compile('|'.join(
+    map(re.escape, sorted(PRODUCT_CORRECTIONS, key=len, reverse=True))
+))
+
+# Häufige OCR-Fehler (Zeichen → Ersetzung) als Übersetzungstabelle
+_OCR_TABLE = str.maketrans({
+    '|': '1',
+    'O': '0',
+    'o': '0',
+    'I': '1',
+    'l': '1',
+    'Z': '2',
+    'S': '5',
+    'B': '8',
+    '€': 'EUR',
+    '£': 'EUR',
+    '$': 'EUR',
+})
 
 # ============ HILFSFUNKTIONEN ============
+_TESS_API = None
+_TESS_FAILED = False
+
+def _close_tess_api():
+    """Gibt die Tesseract-Instanz beim Beenden frei"""
+    if _TESS_API is not None:
+        _TESS_API.End()
+
+def ocr_image(img):
+    """
+    OCR mit einer einmal geladenen Tesseract-Instanz
+    (Fallback: pytesseract, startet pro Bild einen Tesseract-Prozess)
+    """
+    global _TESS_API, _TESS_FAILED
+    if _TESS_API is None and TESSEROCR_AVAILABLE and not _TESS_FAILED:
+        # Sprachdaten der konfigurierten Tesseract-Installation verwenden
+        tessdata = Path(TESSERACT_CMD).parent / "tessdata"
+        try:
+            if tessdata.is_dir():
+                _TESS_API = PyTessBaseAPI(path=str(tessdata), lang=OCR_LANG, psm=PSM.AUTO)
+            else:
+                _TESS_API = PyTessBaseAPI(lang=OCR_LANG, psm=PSM.AUTO)
+            atexit.register(_close_tess_api)
+        except RuntimeError as e:
+            # Einmal melden, danach nur noch pytesseract
+            print(f"tesserocr nicht nutzbar ({e}), verwende pytesseract")
+            _TESS_FAILED = True
+    
+    if _TESS_API is None:
+        return pytesseract.image_to_string(img, lang=OCR_LANG)
+    
+    _TESS_API.SetImage(img)
+    return _TESS_API.GetUTF8Text()
+
 def extract_text_from_pdf(pdf_path, max_pages=5):
     """Extrahiert Text aus PDF, mit OCR-Fallback"""
-    text = ""
+    page_texts = []
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for i in range(min(len(pdf.pages), max_pages)):
-                page = pdf.pages[i]
-                page_text = page.extract_text()
-                if page_text and page_text.strip():
-                    text += page_text + "\n"
-                else:
-                    # OCR für gescannte PDFs
-                    images = convert_from_path(pdf_path, first_page=i+1, last_page=i+1)
-                    for img in images:
-                        text += pytesseract.image_to_string(img) + "\n"
+        # PDF komplett in den Speicher lesen statt vieler kleiner seek/read-Aufrufe
+        with fitz.open(stream=Path(pdf_path).read_bytes(), filetype="pdf") as pdf:
+            pages = list(pdf.pages(0, min(pdf.page_count, max_pages)))
+            page_texts = [page.get_text("text") for page in pages]
+            
+            # OCR nur für gescannte Seiten ohne Textebene, gesammelt in einer Tesseract-Sitzung
+            pages_needing_ocr = [i for i, page_text in enumerate(page_texts)
+                                 if not (page_text or '').strip()]
+            for i in pages_needing_ocr:
+                img = pages[i].get_pixmap(dpi=200).pil_image()
+                page_texts[i] = ocr_image(img)
     except Exception as e:
+        # Bisher extrahierten Text behalten (PIL kann PDFs nicht öffnen, ein OCR-Versuch wäre zwecklos)
         print(f"Fehler bei PDF-Extraktion: {e}")
-        text = pytesseract.image_to_string(Image.open(pdf_path))
     
-    return text.strip()
+    return "\n".join(page_texts).strip()
 
 def extract_text_from_image(image_path):
     """Extrahiert Text aus Bildern mit OCR"""
     try:
         img = Image.open(image_path)
-        text = pytesseract.image_to_string(img, lang='deu+eng')
+        
+        # Graustufen + verkleinern: weniger Pixel für Tesseract, Kontrast für Kassenbons
+        img = img.convert('L')
+        if max(img.size) > OCR_MAX_SIZE:
+            img.thumbnail((OCR_MAX_SIZE, OCR_MAX_SIZE), Image.LANCZOS)
+        img = ImageOps.autocontrast(img)
+        
+        text = ocr_image(img)
         return text.strip()
     except Exception as e:
         print(f"Fehler bei Bild-Extraktion: {e}")
@@ -58,36 +201,13 @@ def extract_text_from_image(image_path):
 
 def clean_ocr_text(text):
     """Bereinigt OCR-Fehler"""
-    # Häufige OCR-Fehler korrigieren
-    replacements = {
-        '|': '1',
-        'O': '0',
-        'o': '0',
-        'I': '1',
-        'l': '1',
-        'Z': '2',
-        'S': '5',
-        'B': '8',
-        '€': 'EUR',
-        '£': 'EUR',
-        '$': 'EUR',
-    }
-    
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-    
-    return text
+    # Häufige OCR-Fehler in einem Durchlauf korrigieren
+    return text.translate(_OCR_TABLE)
 
 def parse_date(text):
     """Versucht Datum aus Text zu extrahieren"""
-    date_patterns = [
-        r'(\d{1,2})[\.\/](\d{1,2})[\.\/](\d{2,4})',
-        r'(\d{1,2})[\.\s]+([A-Za-zäöüß]+)[\.\s]+(\d{2,4})',
-        r'(\d{1,2})[\.\-](\d{1,2})[\.\-](\d{2,4})',
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, text)
+    for pattern in _DATE_PATTERNS:
+        match = pattern.search(text)
         if match:
             try:
                 day, month, year = match.groups()
@@ -102,70 +222,44 @@ def parse_date(text):
 
 def extract_shop_name(text):
     """Extrahiert Geschäftsnamen"""
-    shop_keywords = {
-        'REWE': 'REWE',
-        'EDEKA': 'EDEKA',
-        'ALDI': 'ALDI',
-        'LIDL': 'LIDL',
-        'KAUFLAND': 'KAUFLAND',
-        'NETTO': 'NETTO',
-        'PENNY': 'PENNY',
-        'DM': 'DM',
-        'ROSSMANN': 'ROSSMANN',
-        'TEGUT': 'TEGUT',
-        'BAUHAUS': 'BAUHAUS',
-        'HORNBACH': 'HORNBACH',
-        'OBIMARKT': 'OBIMARKT',
-        'BIO COMPANY': 'BIO COMPANY',
-        'DENNS': 'DENNS',
-        'ALNATURA': 'ALNATURA',
-    }
-    
-    text_upper = text.upper()
-    for keyword, shop in shop_keywords.items():
-        if keyword in text_upper:
-            return shop
+    # Ein Durchlauf über den Text statt einer Suche pro Schlüsselwort;
+    # bei mehreren Treffern gewinnt der früheste Eintrag der Tabelle, nicht der im Text
+    found = set(_SHOP_RE.findall(text.upper()))
+    if found:
+        return SHOP_KEYWORDS[min(found, key=_SHOP_PRIORITY.__getitem__)]
     
     # Versuche aus ersten Zeilen zu extrahieren
     lines = text.split('\n')[:5]
     for line in lines:
         if len(line) > 3 and len(line) < 50:
-            clean_line = re.sub(r'[^\w\s]', '', line).strip()
+            clean_line = _NON_WORD_RE.sub('', line).strip()
             if clean_line and not clean_line.isdigit():
                 return clean_line[:30]
     
     return "Unbekannt"
 
+def parse_cents(amount_str):
+    """Wandelt einen Betrag wie '12,99' oder '12.99' exakt in Cent (int) um"""
+    whole, _, frac = amount_str.replace(',', '.').partition('.')
+    return int(whole) * 100 + int(frac.ljust(2, '0')[:2])
+
 def extract_amounts(text):
     """Extrahiert Beträge aus Text"""
     # Suche nach Geldbeträgen (z.B. 12,99, 12.99, 12,99€, 12.99 EUR)
-    amount_patterns = [
-        r'(\d+[,\.]\d{2})\s*[€$£]?',
-        r'[€$£]\s*(\d+[,\.]\d{2})',
-        r'SUMME[:\s]*(\d+[,\.]\d{2})',
-        r'TOTAL[:\s]*(\d+[,\.]\d{2})',
-        r'ZUZAHLEN[:\s]*(\d+[,\.]\d{2})',
-    ]
-    
-    amounts = []
-    for pattern in amount_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
-            # Standardisiere Dezimaltrenner
-            amount = match.replace(',', '.')
-            try:
-                amount_float = float(amount)
-                if amount_float > 0:
-                    amounts.append(amount_float)
-            except:
-                pass
+    # Intern in Cent rechnen, erst für die Ausgabe in EUR umwandeln
+    amounts_cents = []
+    for pattern in _AMOUNT_PATTERNS:
+        for match in pattern.findall(text):
+            cents = parse_cents(match)
+            if cents > 0:
+                amounts_cents.append(cents)
     
     # Größter Betrag ist wahrscheinlich der Gesamtbetrag
-    if amounts:
+    if amounts_cents:
         return {
-            'all_amounts': amounts,
-            'total': max(amounts),
-            'possible_total': sorted(amounts, reverse=True)[:3]
+            'all_amounts': [c / 100 for c in amounts_cents],
+            'total': max(amounts_cents) / 100,
+            'possible_total': [c / 100 for c in sorted(amounts_cents, reverse=True)[:3]]
         }
     
     return {'all_amounts': [], 'total': 0, 'possible_total': []}
@@ -190,17 +284,16 @@ def parse_products_with_regex(text):
             continue
         
         # Suche nach Preis am Ende der Zeile
-        price_match = re.search(r'(\d+[,\.]\d{2})\s*[A-Z]?$', line_clean)
+        price_match = _PRICE_RE.search(line_clean)
         if price_match:
-            price_str = price_match.group(1).replace(',', '.')
             try:
-                price = float(price_str)
+                price_cents = parse_cents(price_match.group(1))
                 # Produktname ist alles vor dem Preis
                 product_name = line_clean[:price_match.start()].strip()
                 
                 # Versuche Menge zu finden
                 quantity = 1
-                qty_match = re.search(r'^(\d+[,\.]?\d*)\s*[xX]', product_name)
+                qty_match = _QTY_RE.search(product_name)
                 if qty_match:
                     qty_str = qty_match.group(1).replace(',', '.')
                     try:
@@ -213,8 +306,8 @@ def parse_products_with_regex(text):
                     products.append({
                         'name': product_name[:100],
                         'quantity': quantity,
-                        'price': price,
-                        'total': round(quantity * price, 2) if quantity != 1 else price,
+                        'price': price_cents / 100,
+                        'total': (round(quantity * price_cents) if quantity != 1 else price_cents) / 100,
                         'line_number': i + 1,
                         'confidence': 'medium'
                     })
@@ -227,42 +320,19 @@ def enhance_product_names(products, shop_name):
     """
     Verbessert Produktnamen basierend auf typischen Mustern
     """
-    product_corrections = {
-        'KASTANE': 'KASTANIEN',
-        'KASTANIE': 'KASTANIEN',
-        'TOMAT': 'TOMATEN',
-        'GURK': 'GURKE',
-        'PAPRIK': 'PAPRIKA',
-        'ZUCCHIN': 'ZUCCHINI',
-        'AVOCAD': 'AVOCADO',
-        'BANAN': 'BANANE',
-        'APFEL': 'ÄPFEL',
-        'BROT': 'BROT',
-        'MILCH': 'MILCH',
-        'EIER': 'EIER',
-        'KAESE': 'KÄSE',
-        'BUTTER': 'BUTTER',
-        'BIO': 'BIO',
-        'ORGANIC': 'BIO',
-        'FISCH': 'FISCH',
-        'FLEISCH': 'FLEISCH',
-        'WURST': 'WURST',
-        'AUFSTRICH': 'AUFSTRICH',
-    }
-    
     for product in products:
         name_upper = product['name'].upper()
         
-        # Korrektur bekannte Fehler
-        for wrong, correct in product_corrections.items():
-            if wrong in name_upper:
-                # Ersetze nur den falschen Teil
-                product['name'] = product['name'].replace(wrong, correct)
-                product['confidence'] = 'high'
-                break
+        # Korrektur bekannte Fehler: Regex als schneller Vorfilter, dann gewinnt wie gehabt
+        # der erste passende Schlüssel in Tabellenreihenfolge (nicht der früheste Treffer)
+        if _PRODUCT_CORRECTION_RE.search(name_upper):
+            wrong = next(key for key in PRODUCT_CORRECTIONS if key in name_upper)
+            # Ersetze nur den falschen Teil
+            product['name'] = product['name'].replace(wrong, PRODUCT_CORRECTIONS[wrong])
+            product['confidence'] = 'high'
         
         # Entferne Preiszeichen etc.
-        product['name'] = re.sub(r'[\d.,]+\s*[€$£]?$', '', product['name']).strip()
+        product['name'] = _TRAILING_PRICE_RE.sub('', product['name']).strip()
         
         # Wenn Name sehr kurz, versuche zu erraten
         if len(product['name']) < 3 and product['price'] > 0:
@@ -324,7 +394,7 @@ Beispielantwort:
         result = response.choices[0].message.content
         
         # Extrahiere JSON aus der Antwort
-        json_match = re.search(r'\[.*\]', result, re.DOTALL)
+        json_match = _JSON_ARRAY_RE.search(result)
         if json_match:
             products = json.loads(json_match.group())
             for product in products:
@@ -348,10 +418,59 @@ def generate_filename(invoice_data):
     filename = f"{date_str}_{shop_short}_{total:.2f}EUR"
     
     # Entferne ungültige Zeichen
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    filename = _FILENAME_SAFE.sub('_', filename)
     
     return filename[:100] + invoice_data['original_extension']
 
+def extract_invoice_data(file_path):
+    """Extrahiert Text, Metadaten und Produkte aus einer Rechnungsdatei"""
+    # 1. Text extrahieren
+    if file_path.suffix.lower() == '.pdf':
+        text = extract_text_from_pdf(file_path)
+    else:
+        text = extract_text_from_image(file_path)
+    
+    text = clean_ocr_text(text)
+    
+    # 2. Metadaten extrahieren
+    invoice_data = {
+        'original_filename': file_path.name,
+        'original_path': str(file_path),
+        'original_extension': file_path.suffix,
+        'extraction_date': datetime.now().isoformat(),
+        'shop': extract_shop_name(text),
+        'date': parse_date(text),
+        'raw_text_preview': text[:1000],
+        'total_text_length': len(text)
+    }
+    
+    # 3. Beträge extrahieren
+    amounts = extract_amounts(text)
+    invoice_data.update(amounts)
+    
+    # 4. Produkte extrahieren (versuche zuerst mit KI)
+    products = None
+    if USE_OPENAI:
+        products = process_with_openai(text, invoice_data['shop'])
+    
+    # Fallback: Regex-Parsing
+    if not products:
+        products = parse_products_with_regex(text)
+        products = enhance_product_names(products, invoice_data['shop'])
+    
+    invoice_data['products'] = products
+    
+    # 5. Gesamt aus Produkten berechnen (wenn möglich)
+    product_total = sum(p.get('total', 0) for p in products)
+    if product_total > 0:
+        invoice_data['product_total'] = round(product_total, 2)
+        invoice_data['discrepancy'] = round(invoice_data.get('total', 0) - product_total, 2)
+    
+    # 6. Dateinamen für Umbenennung generieren
+    invoice_data['suggested_filename'] = generate_filename(invoice_data)
+    
+    return invoice_data
+
 # ============ HAUPTFUNKTION ============
 def process_invoices():
     """Verarbeitet alle Rechnungen im Eingabeordner"""
@@ -368,70 +487,48 @@ def process_invoices():
     processed_files = []
     
     # Unterstützte Dateiformate
-    supported_extensions = ['.pdf', '.jpg', '.jpeg', '.png', '.bmp', '.tiff']
+    supported_extensions = ('.pdf', '.jpg', '.jpeg', '.png', '.bmp', '.tiff')
     
-    for file_path in INPUT_DIR.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in supported_extensions:
-            print(f"\nVerarbeite: {file_path.name}")
-            
-            # 1. Text extrahieren
-            if file_path.suffix.lower() == '.pdf':
-                text = extract_text_from_pdf(file_path)
-            else:
-                text = extract_text_from_image(file_path)
-            
-            text = clean_ocr_text(text)
-            
-            # 2. Metadaten extrahieren
-            invoice_data = {
-                'original_filename': file_path.name,
-                'original_path': str(file_path),
-                'original_extension': file_path.suffix,
-                'extraction_date': datetime.now().isoformat(),
-                'shop': extract_shop_name(text),
-                'date': parse_date(text),
-                'raw_text_preview': text[:1000],
-                'total_text_length': len(text)
-            }
-            
-            # 3. Beträge extrahieren
-            amounts = extract_amounts(text)
-            invoice_data.update(amounts)
-            
-            # 4. Produkte extrahieren (versuche zuerst mit KI)
-            products = None
-            if USE_OPENAI:
-                products = process_with_openai(text, invoice_data['shop'])
-            
-            # Fallback: Regex-Parsing
-            if not products:
-                products = parse_products_with_regex(text)
-                products = enhance_product_names(products, invoice_data['shop'])
-            
-            invoice_data['products'] = products
-            
-            # 5. Gesamt aus Produkten berechnen (wenn möglich)
-            product_total = sum(p.get('total', 0) for p in products)
-            if product_total > 0:
-                invoice_data['product_total'] = round(product_total, 2)
-                invoice_data['discrepancy'] = round(invoice_data.get('total', 0) - product_total, 2)
+    # os.scandir: Dateityp aus dem Verzeichniseintrag, Path nur für passende Dateien
+    with os.scandir(INPUT_DIR) as entries:
+        invoice_files = [Path(entry.path) for entry in entries
+                         if entry.is_file(follow_symlinks=False)
+                         and entry.name.lower().endswith(supported_extensions)]
+    
+    for file_path in invoice_files:
+        print(f"\nVerarbeite: {file_path.name}")
+        
+        # Cache prüfen (gleicher Dateiinhalt → gleiche Extraktion)
+        file_hash = hashlib.md5(file_path.read_bytes()).hexdigest()
+        cache_file = CACHE_DIR / f"{file_hash}.json"
+        
+        if cache_file.exists():
+            invoice_data = orjson.loads(cache_file.read_bytes())
             
-            # 6. Dateinamen für Umbenennung generieren
+            # Datei kann inzwischen umbenannt/verschoben worden sein
+            invoice_data['original_filename'] = file_path.name
+            invoice_data['original_path'] = str(file_path)
+            invoice_data['original_extension'] = file_path.suffix
             invoice_data['suggested_filename'] = generate_filename(invoice_data)
-            
-            # 7. Speichern als JSON
-            output_file = EXTRACTED_DATA_DIR / f"{file_path.stem}_data.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(invoice_data, f, ensure_ascii=False, indent=2)
-            
-            all_invoices.append(invoice_data)
-            processed_files.append(file_path)
-            
-            print(f"  → Shop: {invoice_data['shop']}")
-            print(f"  → Datum: {invoice_data['date']}")
-            print(f"  → Gesamt: {invoice_data.get('total', 0):.2f} EUR")
-            print(f"  → Produkte: {len(products)}")
-            print(f"  → Gespeichert: {output_file.name}")
+            print("  → Aus Cache geladen")
+        else:
+            invoice_data = extract_invoice_data(file_path)
+            cache_file.write_bytes(orjson.dumps(invoice_data))
+        
+        products = invoice_data['products']
+        
+        # 7. Speichern als JSON
+        output_file = EXTRACTED_DATA_DIR / f"{file_path.stem}_data.json"
+        output_file.write_bytes(orjson.dumps(invoice_data, option=orjson.OPT_INDENT_2))
+        
+        all_invoices.append(invoice_data)
+        processed_files.append(file_path)
+        
+        print(f"  → Shop: {invoice_data['shop']}")
+        print(f"  → Datum: {invoice_data['date']}")
+        print(f"  → Gesamt: {invoice_data.get('total', 0):.2f} EUR")
+        print(f"  → Produkte: {len(products)}")
+        print(f"  → Gespeichert: {output_file.name}")
     
     # 8. Zusammenfassung aller Rechnungen erstellen
     if all_invoices:
@@ -439,30 +536,39 @@ def process_invoices():
             'processing_date': datetime.now().isoformat(),
             'total_invoices': len(all_invoices),
             'total_amount': sum(i.get('total', 0) for i in all_invoices),
-            'invoices': all_invoices
         }
         
-        summary_file = EXTRACTED_DATA_DIR / "alle_rechnungen_zusammenfassung.json"
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+        # JSONL: Zusammenfassung in Zeile 1, danach eine Rechnung pro Zeile
+        summary_file = EXTRACTED_DATA_DIR / "alle_rechnungen_zusammenfassung.jsonl"
+        with open(summary_file, 'wb') as f:
+            f.write(orjson.dumps(summary) + b"\n")
+            for invoice in all_invoices:
+                f.write(orjson.dumps(invoice) + b"\n")
         
-        # CSV für einfache Analyse
-        csv_data = []
-        for inv in all_invoices:
-            for product in inv.get('products', []):
-                csv_data.append({
-                    'Rechnung': inv['original_filename'],
-                    'Datum': inv['date'],
-                    'Shop': inv['shop'],
-                    'Produkt': product.get('name', ''),
-                    'Menge': product.get('quantity', 1),
-                    'Einzelpreis': product.get('price', 0),
-                    'Gesamt': product.get('total', 0),
-                    'Vertrauen': product.get('confidence', 'unknown')
-                })
+        # CSV für einfache Analyse (Produktlisten direkt aus den verschachtelten Daten aufklappen)
+        df = pd.json_normalize(all_invoices, record_path='products',
+                               meta=['original_filename', 'date', 'shop'],
+                               record_prefix='prod_', errors='ignore')
         
-        if csv_data:
-            df = pd.DataFrame(csv_data)
+        if not df.empty:
+            csv_defaults = {
+                'prod_name': '',
+                'prod_quantity': 1,
+                'prod_price': 0,
+                'prod_total': 0,
+                'prod_confidence': 'unknown',
+            }
+            df = df.reindex(columns=['original_filename', 'date', 'shop', *csv_defaults])
+            df = df.fillna(csv_defaults).rename(columns={
+                'original_filename': 'Rechnung',
+                'date': 'Datum',
+                'shop': 'Shop',
+                'prod_name': 'Produkt',
+                'prod_quantity': 'Menge',
+                'prod_price': 'Einzelpreis',
+                'prod_total': 'Gesamt',
+                'prod_confidence': 'Vertrauen',
+            })
             csv_file = EXTRACTED_DATA_DIR / "produkte_alle_rechnungen.csv"
             df.to_csv(csv_file, index=False, encoding='utf-8-sig')
         
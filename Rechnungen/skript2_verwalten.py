@@ -1,7 +1,11 @@
-import json
+import csv
+import os
+import multiprocessing as mp
+import orjson
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import pandas as pd
-from datetime import datetime
+import numpy as np
 
 # ============ KONFIGURATION ============
 SCRIPT_DIR = Path(__file__).parent.absolute()
@@ -10,41 +14,162 @@ INPUT_DIR = SCRIPT_DIR / "rechnungen"
 OUTPUT_REPORT_DIR = SCRIPT_DIR / "rechnungsberichte"
 OUTPUT_REPORT_DIR.mkdir(exist_ok=True)
 
+# Ab dieser Anzahl Rechnungen werden die JSON-Dateien in mehreren Prozessen gelesen
+PARALLEL_PARSE_THRESHOLD = 200
+
+# Spalten der Berichte
+INVOICE_COLS = ('Dateiname', 'Datum', 'Shop', 'Gesamtbetrag', 'Produktanzahl',
+                'Produktsumme', 'Differenz', 'Dateipfad')
+PRODUCT_COLS = ('Rechnung', 'Datum', 'Shop', 'Produkt', 'Menge', 'Einzelpreis',
+                'Gesamt', 'Vertrauen', 'Für mich allein', 'Kommentar')
+
 # ============ FUNKTIONEN ============
-def rename_invoice_files():
-    """Benennt Rechnungsdateien um basierend auf extrahierten Daten"""
+def _split_sums(total, brother, me):
+    """Summiert Gesamt, Bruder- und Ich-Anteil (leere Zellen werden übersprungen)"""
+    return (np.nansum(total, dtype=np.float64), np.nansum(brother, dtype=np.float64),
+            np.nansum(me, dtype=np.float64))
+
+def _load(json_file):
+    """Lädt eine extrahierte Rechnungsdatei"""
+    return json_file, orjson.loads(json_file.read_bytes())
+
+def load_invoice_files(json_files):
+    """Lädt alle JSON-Dateien parallel (Lesezugriffe überlappen sich)"""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return list(executor.map(_load, json_files))
+
+def _load_all():
+    """Lädt alle extrahierten Rechnungen einmal (Pfad -> Daten), z.B. für Umbenennen + Bericht"""
+    return dict(load_invoice_files(list(EXTRACTED_DATA_DIR.glob("*_data.json"))))
+
+def _dir_names(parent):
+    """
+    Dateinamen eines Verzeichnisses (ein os.scandir-Durchlauf), case-gefaltet,
+    da Windows und macOS Namen ohne Beachtung der Groß-/Kleinschreibung vergleichen
+    """
+    try:
+        with os.scandir(parent) as it:
+            return {entry.name.casefold() for entry in it}
+    except FileNotFoundError:
+        return set()
+
+def _set_number_format(writer, sheet_name, first_col, last_col):
+    """Zeigt Spalten eines Excel-Blatts mit zwei Nachkommastellen an (statt Daten zu runden)"""
+    number_format = writer.book.add_format({'num_format': '0.00'})
+    writer.sheets[sheet_name].set_column(first_col, last_col, None, number_format)
+
+def _write_totals_row(writer, sheet_name, df, sum_cols):
+    """Schreibt unter die Tabelle eines Blatts eine GESAMT-Zeile (ohne die Daten zu kopieren)"""
+    row = ['GESAMT', *([''] * (len(df.columns) - 1))]
+    totals = np.nansum(df[list(sum_cols)].to_numpy(dtype=np.float64), axis=0)
+    for col, total in zip(sum_cols, totals):
+        row[df.columns.get_loc(col)] = total
+    total_format = writer.book.add_format({'num_format': '0.00', 'bold': True})
+    # Zeile 0 ist die Kopfzeile, die Daten belegen die Zeilen 1..len(df)
+    writer.sheets[sheet_name].write_row(len(df) + 1, 0, row, total_format)
+
+def _write_interactive_csv(df, csv_path, total_row):
+    """
+    Schreibt die Produkte plus Spalte 'Differenz' und eine GESAMT-Zeile als CSV (UTF-8 mit BOM)
+    
+    Bewusst mit dem pandas-Writer: die Datei wird von Hand bearbeitet, ihr Format
+    (Quoting nur bei Bedarf, True/False, 1.0) soll sich nicht ändern.
+    """
+    csv_columns = [*df.columns, 'Differenz']
+    totals = [total_row.get(col, '') for col in csv_columns]
+    
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(csv_columns)
+        df.to_csv(f, header=False, index=False, lineterminator='\n')
+        writer.writerow(totals)
+
+def _invoice_rows(invoice):
+    """Zerlegt eine Rechnung in eine Zeile nach INVOICE_COLS und Zeilen nach PRODUCT_COLS"""
+    filename = invoice.get('renamed_to', invoice['original_filename'])
+    date = invoice.get('date', 'Unbekannt')
+    shop = invoice.get('shop', 'Unbekannt')
+    products = invoice.get('products', [])
+    
+    invoice_row = (
+        filename,
+        date,
+        shop,
+        invoice.get('total', 0),
+        len(products),
+        invoice.get('product_total', 0),
+        invoice.get('discrepancy', 0),
+        invoice.get('renamed_path', invoice['original_path'])
+    )
+    product_rows = [
+        (
+            filename,
+            date,
+            shop,
+            product.get('name', 'Unbekannt'),
+            product.get('quantity', 1),
+            product.get('price', 0),
+            product.get('total', 0),
+            product.get('confidence', 'unbekannt'),
+            False,  # Für mich allein: manuell zu setzen
+            ''      # Kommentar
+        )
+        for product in products
+    ]
+    return invoice_row, product_rows
+
+def _parse_one(json_file):
+    """Lädt eine Rechnungsdatei und zerlegt sie in Zeilen (läuft im Worker-Prozess)"""
+    return _invoice_rows(orjson.loads(json_file.read_bytes()))
+
+def _collect_rows(parsed):
+    """Sammelt (Rechnungszeile, Produktzeilen)-Paare in zwei flache Listen"""
+    invoice_rows, product_rows = [], []
+    for invoice_row, rows in parsed:
+        invoice_rows.append(invoice_row)
+        product_rows.extend(rows)
+    return invoice_rows, product_rows
+
+def rename_invoice_files(invoices=None):
+    """
+    Benennt Rechnungsdateien um basierend auf extrahierten Daten
+    
+    invoices: bereits geladene Daten aus _load_all() (werden direkt aktualisiert)
+    """
     
     print("=== DATEIEN UMBENENNEN ===")
     
     # Lade alle extrahierten Daten
-    json_files = list(EXTRACTED_DATA_DIR.glob("*_data.json"))
+    if invoices is None:
+        invoices = _load_all()
     
-    if not json_files:
+    if not invoices:
         print("Keine extrahierten Daten gefunden. Führen Sie zuerst das Extraktionsskript aus.")
         return []
     
     renamed_files = []
+    parents_seen = {}  # Verzeichnis -> Menge vorhandener Dateinamen (case-gefaltet)
     
-    for json_file in json_files:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            invoice_data = json.load(f)
-        
+    for json_file, invoice_data in invoices.items():
         original_path = Path(invoice_data['original_path'])
         new_name = invoice_data.get('suggested_filename', original_path.name)
-        new_path = original_path.parent / new_name
+        parent = original_path.parent
+        new_path = parent / new_name
+        existing = parents_seen.get(parent)
+        if existing is None:
+            existing = parents_seen[parent] = _dir_names(parent)
         
         # Verhindere doppelte Dateinamen
+        stem, suffix = new_path.stem, new_path.suffix
         counter = 1
-        while new_path.exists() and new_path != original_path:
-            name_parts = new_name.rsplit('.', 1)
-            if len(name_parts) == 2:
-                new_path = original_path.parent / f"{name_parts[0]}_{counter}.{name_parts[1]}"
-            else:
-                new_path = original_path.parent / f"{new_name}_{counter}"
+        while new_path.name.casefold() in existing and new_path != original_path:
+            new_path = parent / f"{stem}_{counter}{suffix}"
             counter += 1
         
         try:
-            original_path.rename(new_path)
+            os.rename(original_path, new_path)
+            existing.discard(original_path.name.casefold())
+            existing.add(new_path.name.casefold())
             renamed_files.append({
                 'old': original_path.name,
                 'new': new_path.name,
@@ -54,75 +179,90 @@ def rename_invoice_files():
             })
             print(f"Umbenannt: {original_path.name} → {new_path.name}")
             
-            # Aktualisiere den Pfad in der JSON-Datei
+            # Aktualisiere den Pfad in den Daten und schreibe die JSON sofort zurück,
+            # damit ein Abbruch keine umbenannten PDFs mit veralteten Namen hinterlässt
             invoice_data['renamed_to'] = new_path.name
             invoice_data['renamed_path'] = str(new_path)
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(invoice_data, f, ensure_ascii=False, indent=2)
+            json_file.write_bytes(orjson.dumps(invoice_data, option=orjson.OPT_INDENT_2))
                 
         except Exception as e:
             print(f"Fehler beim Umbenennen von {original_path.name}: {e}")
     
     return renamed_files
 
-def create_summary_report():
-    """Erstellt eine Gesamtübersicht aller Rechnungen"""
+def create_summary_report(invoices=None):
+    """
+    Erstellt eine Gesamtübersicht aller Rechnungen
+    
+    invoices: bereits geladene Daten aus _load_all() (dann ohne erneutes Lesen)
+    """
+    # pandas erst bei Bedarf laden (reines Umbenennen startet so deutlich schneller)
+    import pandas as pd
+    from datetime import datetime
     
     print("\n=== GESAMTÜBERSICHT ERSTELLEN ===")
     
-    json_files = list(EXTRACTED_DATA_DIR.glob("*_data.json"))
+    # Rechnungen in Zeilen zerlegen
+    if invoices is not None:
+        if not invoices:
+            print("Keine Daten gefunden.")
+            return None
+        parsed = map(_invoice_rows, invoices.values())
+        invoice_rows, product_rows = _collect_rows(parsed)
+    else:
+        json_files = list(EXTRACTED_DATA_DIR.glob("*_data.json"))
+        
+        if not json_files:
+            print("Keine Daten gefunden.")
+            return None
+        
+        # Bei vielen Dateien parallel in mehreren Prozessen (imap: Zeilen in fester Reihenfolge)
+        if len(json_files) > PARALLEL_PARSE_THRESHOLD:
+            with mp.Pool() as pool:
+                parsed = pool.imap(_parse_one, json_files, chunksize=32)
+                invoice_rows, product_rows = _collect_rows(parsed)
+        else:
+            parsed = (_invoice_rows(invoice) for json_file, invoice in load_invoice_files(json_files))
+            invoice_rows, product_rows = _collect_rows(parsed)
     
-    if not json_files:
-        print("Keine Daten gefunden.")
-        return None
+    # Häufigster Shop und Zeitraum in einem Durchlauf über die Rechnungszeilen
+    shop_counter = Counter()
+    min_date = max_date = None
+    for row in invoice_rows:
+        date, shop = row[1], row[2]
+        shop_counter[shop] += 1
+        if min_date is None or date < min_date:
+            min_date = date
+        if max_date is None or date > max_date:
+            max_date = date
     
-    all_invoices = []
-    all_products = []
+    # DataFrames direkt aus Zeilen-Tupeln erstellen (keine Zwischen-dicts pro Zeile)
+    df_invoices = pd.DataFrame.from_records(invoice_rows, columns=INVOICE_COLS)
+    df_products = pd.DataFrame.from_records(product_rows, columns=PRODUCT_COLS)
     
-    for json_file in json_files:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            invoice = json.load(f)
-        
-        # Rechnungsdaten
-        invoice_summary = {
-            'Dateiname': invoice.get('renamed_to', invoice['original_filename']),
-            'Datum': invoice.get('date', 'Unbekannt'),
-            'Shop': invoice.get('shop', 'Unbekannt'),
-            'Gesamtbetrag': invoice.get('total', 0),
-            'Produktanzahl': len(invoice.get('products', [])),
-            'Produktsumme': invoice.get('product_total', 0),
-            'Differenz': invoice.get('discrepancy', 0),
-            'Dateipfad': invoice.get('renamed_path', invoice['original_path'])
-        }
-        all_invoices.append(invoice_summary)
-        
-        # Produktdaten
-        for product in invoice.get('products', []):
-            product_entry = {
-                'Rechnung': invoice_summary['Dateiname'],
-                'Datum': invoice_summary['Datum'],
-                'Shop': invoice_summary['Shop'],
-                'Produkt': product.get('name', 'Unbekannt'),
-                'Menge': product.get('quantity', 1),
-                'Einzelpreis': product.get('price', 0),
-                'Gesamt': product.get('total', 0),
-                'Vertrauen': product.get('confidence', 'unbekannt'),
-                'Für mich allein': False,  # Manuell zu setzen
-                'Kommentar': ''
-            }
-            all_products.append(product_entry)
+    # Numerische Spalten einheitlich als float64 (float32 verfälscht Geldbeträge sichtbar,
+    # z.B. 12.98999977 statt 12.99); Menge kann Bruchteile enthalten (z.B. 0.5 kg)
+    df_invoices = df_invoices.astype(dict.fromkeys(('Gesamtbetrag', 'Produktsumme', 'Differenz'), np.float64), copy=False)
+    df_products = df_products.astype(dict.fromkeys(('Menge', 'Einzelpreis', 'Gesamt'), np.float64), copy=False)
+    invoice_amounts = df_invoices['Gesamtbetrag'].to_numpy()
+    invoice_total = np.nansum(invoice_amounts)
     
-    # DataFrames erstellen
-    df_invoices = pd.DataFrame(all_invoices)
-    df_products = pd.DataFrame(all_products)
+    # Wiederkehrende Texte als Kategorien (schnelleres groupby, weniger Speicher)
+    df_invoices['Shop'] = df_invoices['Shop'].astype('category')
+    for col in ('Shop', 'Produkt', 'Vertrauen', 'Rechnung'):
+        df_products[col] = df_products[col].astype('category')
     
     # Berichte speichern
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    invoice_report = OUTPUT_REPORT_DIR / f"rechnungsuebersicht_{timestamp}.xlsx"
+    product_report = OUTPUT_REPORT_DIR / f"produktuebersicht_{timestamp}.xlsx"
+    interactive_csv = OUTPUT_REPORT_DIR / f"interaktive_aufteilung_{timestamp}.csv"
     
     # 1. Rechnungsübersicht
-    invoice_report = OUTPUT_REPORT_DIR / f"rechnungsuebersicht_{timestamp}.xlsx"
-    with pd.ExcelWriter(invoice_report, engine='openpyxl') as writer:
+    with pd.ExcelWriter(invoice_report, engine='xlsxwriter') as writer:
         df_invoices.to_excel(writer, sheet_name='Rechnungen', index=False)
+        _write_totals_row(writer, 'Rechnungen', df_invoices,
+                          ('Gesamtbetrag', 'Produktsumme', 'Differenz'))
         
         # Zusammenfassung
         summary_data = {
@@ -130,75 +270,75 @@ def create_summary_report():
                       'Häufigster Shop', 'Zeitraum'],
             'Wert': [
                 len(df_invoices),
-                f"{df_invoices['Gesamtbetrag'].sum():.2f} EUR",
-                f"{df_invoices['Gesamtbetrag'].mean():.2f} EUR",
-                df_invoices['Shop'].mode().iloc[0] if not df_invoices['Shop'].mode().empty else 'N/A',
-                f"{df_invoices['Datum'].min()} bis {df_invoices['Datum'].max()}"
+                f"{invoice_total:.2f} EUR",
+                f"{np.nanmean(invoice_amounts):.2f} EUR",
+                shop_counter.most_common(1)[0][0] if shop_counter else 'N/A',
+                f"{min_date} bis {max_date}"
             ]
         }
         df_summary = pd.DataFrame(summary_data)
         df_summary.to_excel(writer, sheet_name='Zusammenfassung', index=False)
         
         # Shop-Statistik
-        shop_stats = df_invoices.groupby('Shop').agg({
-            'Gesamtbetrag': ['count', 'sum', 'mean'],
-            'Produktanzahl': 'mean'
-        }).round(2)
-        shop_stats.columns = ['Anzahl', 'Gesamt', 'Durchschnitt', 'Produkte/Rechnung']
+        shop_stats = df_invoices.groupby('Shop', sort=False, observed=True).agg(**{
+            'Anzahl': ('Gesamtbetrag', 'count'),
+            'Gesamt': ('Gesamtbetrag', 'sum'),
+            'Durchschnitt': ('Gesamtbetrag', 'mean'),
+            'Produkte/Rechnung': ('Produktanzahl', 'mean'),
+        })
         shop_stats.to_excel(writer, sheet_name='Shop-Statistik')
+        _set_number_format(writer, 'Shop-Statistik', 2, 4)
     
     # 2. Produktübersicht
-    product_report = OUTPUT_REPORT_DIR / f"produktuebersicht_{timestamp}.xlsx"
-    with pd.ExcelWriter(product_report, engine='openpyxl') as writer:
+    with pd.ExcelWriter(product_report, engine='xlsxwriter') as writer:
         df_products.to_excel(writer, sheet_name='Alle Produkte', index=False)
+        _write_totals_row(writer, 'Alle Produkte', df_products, ('Gesamt',))
         
         # Produktstatistik
-        product_stats = df_products.groupby('Produkt').agg({
-            'Menge': 'sum',
-            'Gesamt': 'sum',
-            'Rechnung': 'count'
-        }).round(2)
-        product_stats.columns = ['Gesamtmenge', 'Gesamtkosten', 'Anzahl Rechnungen']
+        product_stats = df_products.groupby('Produkt', sort=False, observed=True).agg(**{
+            'Gesamtmenge': ('Menge', 'sum'),
+            'Gesamtkosten': ('Gesamt', 'sum'),
+            'Anzahl Rechnungen': ('Rechnung', 'count'),
+        })
         product_stats = product_stats.sort_values('Gesamtkosten', ascending=False)
         product_stats.to_excel(writer, sheet_name='Produktstatistik')
+        _set_number_format(writer, 'Produktstatistik', 1, 2)
         
         # Nach Shop
-        shop_product_stats = df_products.groupby(['Shop', 'Produkt']).agg({
-            'Gesamt': 'sum',
-            'Menge': 'sum'
-        }).round(2)
+        # (sortiert lassen, damit die Produkte eines Shops im Blatt zusammenstehen)
+        shop_product_stats = df_products.groupby(['Shop', 'Produkt'], observed=True).agg(
+            Gesamt=('Gesamt', 'sum'),
+            Menge=('Menge', 'sum'),
+        )
         shop_product_stats.to_excel(writer, sheet_name='Nach Shop')
+        _set_number_format(writer, 'Nach Shop', 2, 3)
     
     # 3. Interaktive CSV für individuelle Anpassungen
-    interactive_csv = OUTPUT_REPORT_DIR / f"interaktive_aufteilung_{timestamp}.csv"
     
-    # Füge Spalten für individuelle Aufteilung hinzu
-    df_products['Anteil_Bruder'] = 0.5  # Standard: 50/50
-    df_products['Anteil_Ich'] = 0.5
-    df_products['Betrag_Bruder'] = df_products['Gesamt'] * df_products['Anteil_Bruder']
-    df_products['Betrag_Ich'] = df_products['Gesamt'] * df_products['Anteil_Ich']
+    # Füge Spalten für individuelle Aufteilung hinzu (Standard: 50/50, in einem numexpr-Durchlauf)
+    df_products.eval("""
+    Anteil_Bruder = 0.5
+    Anteil_Ich = 0.5
+    Betrag_Bruder = Gesamt * Anteil_Bruder
+    Betrag_Ich = Gesamt * Anteil_Ich
+    """, inplace=True)
     
-    # Berechne Gesamtsummen
-    total_all = df_products['Gesamt'].sum()
-    total_brother = df_products['Betrag_Bruder'].sum()
-    total_me = df_products['Betrag_Ich'].sum()
+    # Berechne Gesamtsummen (eine Reduktion über alle drei Spalten, leere Zellen übersprungen)
+    total_all, total_brother, total_me = np.nansum(
+        df_products[['Gesamt', 'Betrag_Bruder', 'Betrag_Ich']].to_numpy(dtype=np.float64), axis=0
+    )
     
-    # Füge Gesamtsummen hinzu
-    total_row = pd.DataFrame([{
+    # Gesamtzeile direkt anhängen (kein pd.concat: keine Kopie, numerische Spalten behalten ihren Typ)
+    total_row = {
         'Rechnung': 'GESAMT',
-        'Datum': '',
-        'Shop': '',
         'Produkt': 'SUMME ALLER PRODUKTE',
-        'Menge': '',
-        'Einzelpreis': '',
         'Gesamt': total_all,
         'Betrag_Bruder': total_brother,
         'Betrag_Ich': total_me,
         'Differenz': total_all - (total_brother + total_me)
-    }])
+    }
     
-    df_with_totals = pd.concat([df_products, total_row], ignore_index=True)
-    df_with_totals.to_csv(interactive_csv, index=False, encoding='utf-8-sig')
+    _write_interactive_csv(df_products, interactive_csv, total_row)
     
     print(f"\nBerichte erstellt:")
     print(f"1. Rechnungsübersicht: {invoice_report}")
@@ -207,7 +347,7 @@ def create_summary_report():
     
     print(f"\nGesamtstatistik:")
     print(f"- Rechnungen: {len(df_invoices)}")
-    print(f"- Gesamtbetrag: {df_invoices['Gesamtbetrag'].sum():.2f} EUR")
+    print(f"- Gesamtbetrag: {invoice_total:.2f} EUR")
     print(f"- Produkte: {len(df_products)}")
     print(f"- Standardaufteilung (50/50):")
     print(f"  → Bruder: {total_brother:.2f} EUR")
@@ -227,16 +367,21 @@ def update_split_from_csv(csv_path):
     """
     Liest eine bearbeitete CSV und aktualisiert die Gesamtberechnung
     """
+    import pandas as pd
+    
     try:
-        df = pd.read_csv(csv_path, encoding='utf-8-sig')
+        split_columns = ['Gesamt', 'Betrag_Bruder', 'Betrag_Ich']
+        df = pd.read_csv(csv_path, encoding='utf-8-sig', engine='c',
+                         usecols=['Rechnung', *split_columns],
+                         dtype={col: np.float64 for col in split_columns})
         
         # Entferne Gesamtzeile falls vorhanden
-        df = df[df['Rechnung'] != 'GESAMT']
+        mask = df['Rechnung'].to_numpy() != 'GESAMT'
         
         # Berechne neue Summen
-        total_all = df['Gesamt'].sum()
-        total_brother = df['Betrag_Bruder'].sum()
-        total_me = df['Betrag_Ich'].sum()
+        total_all, total_brother, total_me = _split_sums(
+            *(df[col].to_numpy()[mask] for col in split_columns)
+        )
         
         print(f"\nAktualisierte Aufteilung:")
         print(f"Gesamt: {total_all:.2f} EUR")
@@ -255,37 +400,52 @@ def update_split_from_csv(csv_path):
         return None
 
 # ============ HAUPTMENÜ ============
+MENU = """
+Was möchten Sie tun?
+1. Dateien umbenennen (basierend auf extrahierten Daten)
+2. Gesamtbericht erstellen
+3. Aufteilung aus CSV aktualisieren
+4. Beides (1+2)
+5. Beenden"""
+
+def _update_split_interactive():
+    """Fragt nach der bearbeiteten CSV und berechnet die Aufteilung neu"""
+    csv_file = input("Pfad zur bearbeiteten CSV-Datei: ").strip()
+    if Path(csv_file).exists():
+        update_split_from_csv(csv_file)
+    else:
+        print("Datei existiert nicht.")
+
+def _rename_and_report():
+    """Umbenennen und Bericht (Daten nur einmal laden und für beide Schritte verwenden)"""
+    invoices = _load_all()
+    rename_invoice_files(invoices)
+    create_summary_report(invoices)
+
+ACTIONS = {
+    '1': rename_invoice_files,
+    '2': create_summary_report,
+    '3': _update_split_interactive,
+    '4': _rename_and_report,
+}
+
 def main():
     print("=== RECHNUNGS MANAGER ===")
     print(f"Skript-Verzeichnis: {SCRIPT_DIR}")
     print("=" * 50)
     
     while True:
-        print("\nWas möchten Sie tun?")
-        print("1. Dateien umbenennen (basierend auf extrahierten Daten)")
-        print("2. Gesamtbericht erstellen")
-        print("3. Aufteilung aus CSV aktualisieren")
-        print("4. Beides (1+2)")
-        print("5. Beenden")
+        print(MENU)
         
         choice = input("\nIhre Wahl (1-5): ").strip()
         
-        if choice == "1":
-            rename_invoice_files()
-        elif choice == "2":
-            create_summary_report()
-        elif choice == "3":
-            csv_file = input("Pfad zur bearbeiteten CSV-Datei: ").strip()
-            if Path(csv_file).exists():
-                update_split_from_csv(csv_file)
-            else:
-                print("Datei existiert nicht.")
-        elif choice == "4":
-            rename_invoice_files()
-            create_summary_report()
-        elif choice == "5":
+        if choice == "5":
             print("Programm beendet.")
             break
+        
+        action = ACTIONS.get(choice)
+        if action:
+            action()
         else:
             print("Ungültige Eingabe.")
 
@@ -9,24 +9,253 @@ Erweiterter Datei-Organizer mit allen Funktionen:
 """
 
 import os
-import json
 import sys
 import shutil
 import hashlib
+import heapq
+import mmap
+import pickle
+import random
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Set, Tuple, Any
 import click
+import cv2
+import numpy as np
+import orjson
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+try:
+    import fcntl  # Reflink-Kopien (nur Unix)
+    FICLONE = getattr(fcntl, 'FICLONE', 0x40049409)
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
 
 # Eigene Module
-from utils.image_analyzer import ImageAnalyzer
+from utils.image_analyzer import ImageAnalyzer, YOLO_AVAILABLE
 from utils.duplicate_detector import DuplicateDetector
 from utils.filename_generator import FilenameGenerator
 from utils.aesthetic_scorer import AestheticScorer
+from utils.analysis_cache import AnalysisCache
+
+# Schneller Hash: kleine Dateien komplett, große nur Anfang + Mitte + Ende + Größe
+HASH_SAMPLE_SIZE = 65536
+HASH_CHUNK_SIZE = 16384
+HASH_FULL_LIMIT = 1024 * 1024
+
+# Wiederverwendeter Lesepuffer je Thread (keine neue bytes-Allokation pro Datei)
+_HASH_BUFFERS = threading.local()
+
+def _hash_buffer() -> memoryview:
+    """Liefert den Hash-Lesepuffer des aktuellen Threads"""
+    buf = getattr(_HASH_BUFFERS, 'buf', None)
+    if buf is None:
+        buf = _HASH_BUFFERS.buf = memoryview(bytearray(HASH_FULL_LIMIT))
+    return buf
+
+# Optionen für Berichte (eingerückt, Zahlen-Keys und numpy-Werte erlaubt)
+REPORT_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _json_default(obj):
+    """Serialisiert Typen, die orjson nicht kennt (z.B. Path)"""
+    if isinstance(obj, Path):
+        return str(obj)
+    raise TypeError(f"Typ {type(obj).__name__} nicht serialisierbar")
+
+# Bereinigung von Namen (vorkompiliert, Ergebnisse gecacht - Kategorien/Wörter wiederholen sich)
+_INVALID_PATH_CHARS = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s-]')
+_MULTI_UNDERSCORE_RE = re.compile(r'_+')
+
+@lru_cache(maxsize=4096)
+def clean_category_name(name: str) -> str:
+    """Bereinigt Kategorienamen für Dateisystem"""
+    # Ersetze ungültige Zeichen
+    name = name.translate(_INVALID_PATH_CHARS)
+    # Entferne doppelte Unterstriche
+    name = _MULTI_UNDERSCORE_RE.sub('_', name)
+    return name.strip('_')
+
+@lru_cache(maxsize=4096)
+def clean_string_for_filename(text: str) -> str:
+    """Bereinigt String für Dateinamen"""
+    # Entferne Sonderzeichen
+    text = _SPECIAL_CHARS_RE.sub('', text)
+    # Ersetze Leerzeichen mit Unterstrichen
+    text = text.replace(' ', '_')
+    # Mehrfache Unterstriche entfernen
+    text = _MULTI_UNDERSCORE_RE.sub('_', text)
+    return text.strip('_').lower()
+
+def reserve_target_path(target_dir: Path, name: str) -> Path:
+    """
+    Reserviert einen freien Zielpfad atomar (O_EXCL) und gibt ihn zurück
+    
+    Bei Kollisionen wird ein zufälliger Zähler gewählt, dessen Bereich sich nach
+    jedem Fehlversuch verdoppelt, statt Namen_1, _2, ... einzeln per exists() zu prüfen.
+    """
+    stem, suffix = Path(name).stem, Path(name).suffix
+    target_path = target_dir / name
+    bits = 4
+    while True:
+        try:
+            fd = os.open(target_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            counter = random.randrange(1, 2 ** bits)
+            target_path = target_dir / f"{stem}_{counter}{suffix}"
+            bits += 1
+            continue
+        os.close(fd)
+        return target_path
+
+def _copy_fast(src: Path, dst: Path):
+    """Kopiert per Reflink (Copy-on-Write) oder copy_file_range im Kernel"""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        if FCNTL_AVAILABLE:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return
+            except OSError:
+                pass  # Dateisystem ohne Reflink (ext4, NTFS, ...)
+        if not hasattr(os, 'copy_file_range'):
+            raise OSError("copy_file_range nicht verfügbar")
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                raise OSError("copy_file_range ohne Fortschritt")
+            remaining -= copied
+
+def _fast_move(src: Path, dst: Path, dst_dev: int):
+    """
+    Verschiebt src nach dst (dst darf als Platzhalter existieren)
+    
+    Gleiches Dateisystem: ein rename(). Sonst Reflink/copy_file_range statt
+    Byte-für-Byte-Kopie in Python, als letzter Ausweg shutil.move.
+    """
+    if os.stat(src).st_dev == dst_dev:
+        os.replace(src, dst)
+        return
+    try:
+        _copy_fast(src, dst)
+        shutil.copystat(src, dst)
+        os.remove(src)
+    except OSError:
+        shutil.move(str(src), str(dst))
+
+def format_mtime(mtime_ns: int, fmt: str = '%Y-%m-%d') -> str:
+    """Formatiert einen Zeitstempel in Nanosekunden (erst bei der Anzeige)"""
+    return datetime.fromtimestamp(mtime_ns / 1e9).strftime(fmt)
+
+# Kompakte Metadaten je Datei (Index in results, Größe, Änderungszeit, Hash) für Vergleiche
+META_DTYPE = np.dtype([('idx', 'i4'), ('size', 'i8'), ('mtime', 'i8'), ('hash', 'S16')])
+
+# Objektklassen für die mittlere Bildkategorisierung
+_PERSON_OBJECTS = frozenset({'person', 'face'})
+_VEHICLE_OBJECTS = frozenset({'car', 'bicycle', 'motorcycle'})
+_NATURE_OBJECTS = frozenset({'tree', 'flower', 'plant'})
+
+# Basiskategorie je Dateiendung
+_EXT2CAT = {
+    **dict.fromkeys(('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp'), 'Bilder'),
+    **dict.fromkeys(('.pdf', '.docx', '.doc', '.txt', '.md'), 'Dokumente'),
+    **dict.fromkeys(('.mp3', '.wav', '.flac', '.mp4', '.avi', '.mov'), 'Medien'),
+    **dict.fromkeys(('.py', '.c', '.cpp', '.java', '.js'), 'Code'),
+    **dict.fromkeys(('.xlsx', '.xls', '.csv'), 'Tabellen'),
+}
+
+# Bilder für die Bildanalyse; werden in Batches an das Modell gegeben
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+IMAGE_BATCH_SIZE = 32
+
+# Einstellungen, von denen die gecachte Analyse abhängt (Vorschlagsname, Ästhetik, Bildanalyse)
+ANALYSIS_CONFIG_KEYS = ('rename_files', 'naming_scheme', 'detect_aesthetic_files',
+                        'min_aesthetic_score', 'aesthetic_categories', 'image_analysis')
+
+
+def analysis_config_key(config: Dict) -> str:
+    """Fingerabdruck der analyserelevanten Einstellungen für den AnalysisCache"""
+    relevant = {key: config.get(key) for key in ANALYSIS_CONFIG_KEYS}
+    return hashlib.sha1(orjson.dumps(relevant, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+
+@dataclass
+class Plan:
+    """Vorab festgelegte Entscheidungen eines Laufs (keine Rückfragen mitten in der Analyse)"""
+    dup_strategy: str = 'ask'  # 'ask', 'keep-all', 'newest', 'largest', 'manual'
+    auto_categories: bool = False  # Kategorien ohne Bestätigung übernehmen
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> 'Plan':
+        return cls(
+            dup_strategy=config.get('duplicate_handling', 'ask'),
+            auto_categories=config.get('auto_categories', False)
+        )
+
+# Organizer-Instanz pro Worker-Prozess (Analysatoren/Modelle nur einmal laden)
+_WORKER_ORGANIZER = None
+
+def _init_worker(config: Dict):
+    """
+    Initialisiert den Organizer eines Worker-Prozesses
+
+    OpenCV und torch rechnen single-threaded, da bereits ein Prozess pro Kern läuft.
+    """
+    global _WORKER_ORGANIZER
+    cv2.setNumThreads(1)
+    if YOLO_AVAILABLE:
+        import torch
+        torch.set_num_threads(1)
+    _WORKER_ORGANIZER = EnhancedFileOrganizer(config=config)
+
+def _analyze_in_worker(item: Tuple[Path, os.stat_result]) -> Tuple[Path, Optional[Dict], Optional[str]]:
+    """Analysiert eine Datei im Worker-Prozess (Fehler werden zurückgegeben statt geworfen)"""
+    return _WORKER_ORGANIZER.analyze_single_file_safe(*item)
+
+def _analyze_images_in_worker(items: List[Tuple[Path, os.stat_result]]) -> List[Tuple[Path, Optional[Dict], Optional[str]]]:
+    """Analysiert einen Batch Bilder im Worker-Prozess"""
+    return _WORKER_ORGANIZER.analyze_image_batch_safe(items)
+
+def iter_files(directory, extensions: Set[str]):
+    """Durchläuft ein Verzeichnis rekursiv in einem Durchgang (liefert Pfad und stat je Datei)"""
+    try:
+        it = os.scandir(directory)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path, extensions)
+            elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                try:
+                    # lstat genügt außer bei Symlinks (unter Windows liefert scandir es ohne Syscall)
+                    yield Path(entry.path), entry.stat(follow_symlinks=entry.is_symlink())
+                except OSError:
+                    continue
 
 class EnhancedFileOrganizer:
-    def __init__(self, config_path: Optional[Path] = None):
-        self.config = self.load_config(config_path)
+    def __init__(self, config_path: Optional[Path] = None, config: Optional[Dict] = None):
+        # Fertige Konfiguration (z.B. in Worker-Prozessen) wird direkt übernommen
+        self.config = config if config is not None else self.load_config(config_path)
         self.image_analyzer = ImageAnalyzer(self.config)
         self.duplicate_detector = DuplicateDetector(self.config)
         self.filename_generator = FilenameGenerator(self.config)
@@ -44,6 +273,14 @@ class EnhancedFileOrganizer:
         }
         
         self.categories = {}
+        self.plan = Plan.from_config(self.config)
+        
+        # Analyseergebnisse und ihre Metadaten als strukturiertes Array (gleiche Reihenfolge)
+        self._results: List[Dict] = []
+        self._meta = np.empty(0, dtype=META_DTYPE)
+        self.aesthetic_categories = frozenset(
+            cat.lower() for cat in self.config.get('aesthetic_categories', [])
+        )
         
     def load_config(self, config_path: Optional[Path]) -> Dict:
         """Lädt Konfiguration mit Defaults"""
@@ -53,6 +290,7 @@ class EnhancedFileOrganizer:
             'category_granularity': 'mittel',
             'max_categories': {'wenig': 5, 'mittel': 15, 'viel': 30},
             'duplicate_handling': 'ask',
+            'auto_categories': False,
             'similarity_threshold': 0.95,
             'rename_files': True,
             'naming_scheme': 'descriptive',
@@ -60,13 +298,13 @@ class EnhancedFileOrganizer:
             'aesthetic_categories': ['inspiration', 'schön', 'lustig', 'kunst', 'design'],
             'interactive': True,
             'preview_before_move': True,
-            'image_analysis': {'use_yolo': True, 'describe_scene': True}
+            'image_analysis': {'use_yolo': True, 'describe_scene': True},
+            'use_analysis_cache': True
         }
         
         if config_path and config_path.exists():
-            with open(config_path, 'r', encoding='utf-8') as f:
-                user_config = json.load(f)
-                defaults.update(user_config)
+            user_config = orjson.loads(config_path.read_bytes())
+            defaults.update(user_config)
         
         # Pfade konvertieren
         defaults['input_dir'] = Path(defaults['input_dir'])
@@ -98,35 +336,117 @@ class EnhancedFileOrganizer:
             else:
                 print("❌ Ungültige Eingabe. Bitte 1-4 wählen.")
     
-    def analyze_files(self) -> Dict[str, Any]:
-        """Analysiert alle Dateien mit erweiterten Funktionen"""
+    def ask_duplicate_strategy(self) -> str:
+        """Fragt vorab, wie mit Duplikaten umgegangen werden soll"""
+        print("\n" + "="*60)
+        print("🔍 DUPLIKATE")
+        print("="*60)
+        print("Wie möchtest Du mit Duplikaten umgehen?")
+        print("1. Behalte alle")
+        print("2. Behalte nur die neueste Version")
+        print("3. Behalte nur die größte Datei")
+        print("4. Manuell für jede Gruppe entscheiden")
+        
+        strategies = {'1': 'keep-all', '2': 'newest', '3': 'largest', '4': 'manual'}
+        while True:
+            choice = input("\nDeine Wahl (1-4): ").strip()
+            if choice in strategies:
+                return strategies[choice]
+            print("❌ Ungültige Eingabe. Bitte 1-4 wählen.")
+    
+    def ask_plan(self):
+        """Stellt alle Fragen gesammelt vor der Analyse"""
+        self.config['category_granularity'] = self.ask_category_granularity()
+        if self.plan.dup_strategy == 'ask':
+            self.plan.dup_strategy = self.ask_duplicate_strategy()
+    
+    def scan_files(self) -> List[Tuple[Path, os.stat_result]]:
+        """Sammelt alle unterstützten Dateien mit ihrem stat"""
+        # Ein Verzeichnisdurchlauf für alle Endungen (stat wird gleich mitgenommen)
+        extensions = {ext.lower() for ext in self.config['supported_extensions']}
+        return list(iter_files(self.config['input_dir'], extensions))
+    
+    def analyze_files(self, all_files: Optional[List[Tuple[Path, os.stat_result]]] = None) -> Dict[str, Any]:
+        """Analysiert alle Dateien mit erweiterten Funktionen (all_files: Ergebnis von scan_files)"""
         print("🔍 Analysiere Dateien...")
         
-        all_files = []
-        for ext in self.config['supported_extensions']:
-            all_files.extend(self.config['input_dir'].rglob(f"*{ext}"))
+        if all_files is None:
+            all_files = self.scan_files()
         
         self.stats['total_files'] = len(all_files)
         
-        results = []
-        with click.progressbar(all_files, label='Dateien analysieren') as files:
-            for file_path in files:
-                try:
-                    file_info = self.analyze_single_file(file_path)
-                    results.append(file_info)
-                    self.stats['processed'] += 1
-                except Exception as e:
-                    print(f"\n⚠️ Fehler bei {file_path.name}: {e}")
-                    self.stats['errors'] += 1
+        # Unveränderte Dateien aus dem Cache des letzten Laufs übernehmen
+        cache = None
+        cached_results = []
+        stat_keys = {}
+        to_analyze = all_files
+        if self.config.get('use_analysis_cache', True):
+            cache = AnalysisCache(self.config['output_dir'] / '.organizer_cache.sqlite',
+                                  analysis_config_key(self.config))
+            to_analyze = []
+            for file_path, st in all_files:
+                key = stat_keys[str(file_path)] = (st.st_mtime_ns, st.st_size)
+                file_info = cache.get(str(file_path), *key)
+                # Einträge älterer Versionen (ISO-Datumsstrings statt mtime_ns) neu analysieren
+                if file_info is None or 'mtime_ns' not in file_info:
+                    to_analyze.append((file_path, st))
+                else:
+                    cached_results.append(file_info)
+            if cached_results:
+                print(f"♻️ {len(cached_results)} Dateien unverändert (aus Cache)")
+        
+        # Bilder in Batches (ein Modellaufruf pro Batch), übrige Dateien einzeln
+        image_items = [item for item in to_analyze if item[0].suffix.lower() in IMAGE_EXTENSIONS]
+        other_items = [item for item in to_analyze if item[0].suffix.lower() not in IMAGE_EXTENSIONS]
+        image_batches = [image_items[i:i + IMAGE_BATCH_SIZE]
+                         for i in range(0, len(image_items), IMAGE_BATCH_SIZE)]
+        
+        # Dateien parallel analysieren (ein Prozess pro Kern, Analysatoren je Worker einmal geladen;
+        # nicht mehr Prozesse als Aufgaben, da jeder Worker eigene Modelle lädt)
+        max_workers = min(os.cpu_count() or 1, len(image_batches) + len(other_items))
+        if not max_workers:
+            # Alles aus dem Cache - kein Pool nötig
+            results, errors = [], 0
+        else:
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                         initargs=(self.config,)) as executor:
+                    results, errors = self._collect_analysis(chain(
+                        chain.from_iterable(executor.map(_analyze_images_in_worker, image_batches)),
+                        executor.map(_analyze_in_worker, other_items, chunksize=16)
+                    ), len(to_analyze))
+            except (BrokenProcessPool, pickle.PicklingError) as e:
+                # z.B. nicht übertragbare Modelle (CUDA) - dann Threads im selben Prozess
+                print(f"\n⚠️ Prozess-Pool nicht nutzbar ({e}), verwende Threads...")
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    results, errors = self._collect_analysis(chain(
+                        chain.from_iterable(executor.map(self.analyze_image_batch_safe, image_batches)),
+                        executor.map(lambda item: self.analyze_single_file_safe(*item), other_items)
+                    ), len(to_analyze))
+        
+        if cache:
+            cache.put_many(
+                (info['path'], *stat_keys[info['path']], info)
+                for info in results if info['path'] in stat_keys
+            )
+            cache.prune_missing()
+            cache.close()
+        results = cached_results + results
+        
+        self.stats['processed'] += len(results)
+        self.stats['errors'] += errors
         
-        # Duplikate finden
+        # Duplikate finden (gehasht werden nur Dateien mit mehrfach vorkommender Größe);
+        # jede Gruppe ist ein int32-Array mit Indizes in results
         print("\n🔍 Suche nach Duplikaten...")
+        self.add_size_bucket_hashes(results)
+        self._build_meta(results)
         duplicate_groups = self.duplicate_detector.find_duplicates(results)
-        self.stats['duplicates_found'] = sum(len(group) for group in duplicate_groups)
+        self.stats['duplicates_found'] = sum(group.size for group in duplicate_groups)
         
-        # Duplikate behandeln
-        if duplicate_groups and self.config['interactive']:
-            duplicate_groups = self.handle_duplicates_interactive(duplicate_groups)
+        # Duplikate nach der vorab gewählten Strategie behandeln
+        if duplicate_groups:
+            duplicate_groups = self.handle_duplicates(duplicate_groups)
         
         # Ästhetische Dateien erkennen
         if self.config['detect_aesthetic_files']:
@@ -145,16 +465,69 @@ class EnhancedFileOrganizer:
             'stats': self.stats.copy()
         }
     
-    def analyze_single_file(self, file_path: Path) -> Dict:
-        """Analysiert eine einzelne Datei mit allen Funktionen"""
+    def _build_meta(self, results: List[Dict]):
+        """Legt Größe, Änderungszeit und Hash aller Ergebnisse als strukturiertes Array ab"""
+        meta = np.empty(len(results), dtype=META_DTYPE)
+        meta['idx'] = np.arange(len(results), dtype=np.int32)
+        meta['size'] = [file_info['size_bytes'] for file_info in results]
+        meta['mtime'] = [file_info['mtime_ns'] for file_info in results]
+        meta['hash'] = [(file_info.get('size_bucket_hash') or '').encode('ascii')[:16]
+                        for file_info in results]
+        
+        self._results = results
+        self._meta = meta
+    
+    def _collect_analysis(self, outcomes, total: int) -> Tuple[List[Dict], int]:
+        """Sammelt Analyseergebnisse mit Fortschrittsanzeige"""
+        results = []
+        errors = 0
+        with click.progressbar(length=total, label='Dateien analysieren') as bar:
+            for file_path, file_info, error in outcomes:
+                if error is None:
+                    results.append(file_info)
+                else:
+                    print(f"\n⚠️ Fehler bei {file_path.name}: {error}")
+                    errors += 1
+                bar.update(1)
+        return results, errors
+    
+    def analyze_single_file_safe(self, file_path: Path, st: Optional[os.stat_result] = None,
+                                 image_analysis=None) -> Tuple[Path, Optional[Dict], Optional[str]]:
+        """Wie analyze_single_file, gibt Fehler aber als Text zurück"""
+        try:
+            return file_path, self.analyze_single_file(file_path, st, image_analysis), None
+        except Exception as e:
+            return file_path, None, str(e)
+    
+    def analyze_image_batch_safe(self, items: List[Tuple[Path, os.stat_result]]
+                                 ) -> List[Tuple[Path, Optional[Dict], Optional[str]]]:
+        """Analysiert mehrere Bilder: Bildanalyse als Batch, danach jede Datei einzeln"""
+        try:
+            image_results = self.image_analyzer.analyze_images_batch(
+                [file_path for file_path, _ in items], batch_size=IMAGE_BATCH_SIZE
+            )
+        except Exception as e:
+            print(f"\n⚠️ Batch-Bildanalyse fehlgeschlagen, analysiere einzeln: {e}")
+            image_results = {}
+        return [self.analyze_single_file_safe(file_path, st, image_results.get(file_path))
+                for file_path, st in items]
+    
+    def analyze_single_file(self, file_path: Path, st: Optional[os.stat_result] = None,
+                            image_analysis=None) -> Dict:
+        """
+        Analysiert eine einzelne Datei mit allen Funktionen
+        
+        st: bereits gelesenes stat, image_analysis: Ergebnis einer Batch-Bildanalyse
+        """
+        if st is None:
+            st = file_path.stat()
         file_info = {
             'path': str(file_path),
             'filename': file_path.name,
             'extension': file_path.suffix.lower(),
-            'size_bytes': file_path.stat().st_size,
-            'modified': datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-            'created': datetime.fromtimestamp(file_path.stat().st_ctime).isoformat(),
-            'hash': self.calculate_file_hash(file_path),
+            'size_bytes': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'ctime_ns': st.st_ctime_ns,
             'content_preview': '',
             'metadata': {},
             'analysis': {}
@@ -164,8 +537,9 @@ class EnhancedFileOrganizer:
         file_info['content_preview'] = self.extract_content_preview(file_path)
         
         # Für Bilder: Erweiterte Analyse
-        if file_info['extension'] in ['.jpg', '.jpeg', '.png', '.bmp', '.webp']:
-            image_analysis = self.image_analyzer.analyze_image(file_path)
+        if file_info['extension'] in IMAGE_EXTENSIONS:
+            if image_analysis is None:
+                image_analysis = self.image_analyzer.analyze_image(file_path)
             file_info['analysis']['image'] = image_analysis
             
             # Automatische Beschreibung generieren
@@ -191,9 +565,21 @@ class EnhancedFileOrganizer:
         
         try:
             if ext in ['.txt', '.md', '.json', '.csv']:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    return f.read(2000)
+                # Nur den Anfang lesen, unabhängig von der Dateigröße
+                with open(file_path, 'rb') as f:
+                    return f.read(4096).decode('utf-8', 'ignore')[:2000]
             elif ext == '.pdf':
+                if PDFIUM_AVAILABLE:
+                    pdf = pdfium.PdfDocument(str(file_path))
+                    try:
+                        text = ""
+                        for i in range(min(2, len(pdf))):  # Nur erste 2 Seiten
+                            text += pdf[i].get_textpage().get_text_bounded()
+                            if len(text) >= 2000:
+                                break
+                        return text[:2000]
+                    finally:
+                        pdf.close()
                 import pdfplumber
                 with pdfplumber.open(file_path) as pdf:
                     text = ""
@@ -201,60 +587,80 @@ class EnhancedFileOrganizer:
                         text += page.extract_text() or ""
                     return text[:2000]
             elif ext == '.py':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    # Extrahiere Kommentare und Funktionen
-                    lines = f.readlines()
-                    important = [l for l in lines if l.strip().startswith(('#', 'def ', 'class '))]
-                    return ''.join(important[:20])[:2000]
+                # Extrahiere Kommentare und Funktionen aus dem Dateianfang
+                with open(file_path, 'rb') as f:
+                    lines = f.read(8192).decode('utf-8', 'ignore').split('\n')
+                important = [l for l in lines if l.strip().startswith(('#', 'def ', 'class '))]
+                return '\n'.join(important[:20])[:2000]
             else:
                 return f"Dateityp: {ext}"
         except:
             return f"Kann Inhalt nicht lesen: {ext}"
     
     def calculate_file_hash(self, file_path: Path) -> str:
-        """Berechnet Hash für Duplikaterkennung"""
-        hasher = hashlib.md5()
-        with open(file_path, 'rb') as f:
-            # Nur ersten 64KB für schnellen Hash
-            hasher.update(f.read(65536))
-        return hasher.hexdigest()
-    
-    def handle_duplicates_interactive(self, duplicate_groups: List[List[Dict]]) -> List[List[Dict]]:
-        """Behandelt Duplikate interaktiv"""
+        """Berechnet Hash für Duplikaterkennung (nicht kryptografisch, nur zum Gruppieren)"""
+        buf = _hash_buffer()
+        
+        if not XXHASH_AVAILABLE:
+            with open(file_path, 'rb', buffering=0) as f:
+                # Nur ersten 64KB für schnellen Hash
+                n = f.readinto(buf[:HASH_SAMPLE_SIZE])
+            return hashlib.md5(buf[:n]).hexdigest()
+        
+        with open(file_path, 'rb', buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= HASH_FULL_LIMIT:
+                n = f.readinto(buf)
+                return xxhash.xxh3_64_hexdigest(buf[:n])
+            
+            # Große Dateien: Anfang, Mitte, Ende und Größe (weniger Fehltreffer als nur der Anfang)
+            middle = (size - HASH_CHUNK_SIZE) // 2
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                hasher = xxhash.xxh3_64()
+                hasher.update(view[:HASH_CHUNK_SIZE])
+                hasher.update(view[middle:middle + HASH_CHUNK_SIZE])
+                hasher.update(view[-HASH_CHUNK_SIZE:])
+                hasher.update(size.to_bytes(8, 'little'))
+                return hasher.hexdigest()
+    
+    def add_size_bucket_hashes(self, results: List[Dict]):
+        """
+        Setzt 'size_bucket_hash' für Dateien, deren Größe mehrfach vorkommt
+        
+        Dateien mit einmaliger Größe können keine exakten Duplikate haben und werden nicht gelesen.
+        """
+        by_size = defaultdict(list)
+        for file_info in results:
+            by_size[file_info['size_bytes']].append(file_info)
+        candidates = [file_info for group in by_size.values() if len(group) > 1 for file_info in group]
+        
+        def safe_hash(file_info: Dict) -> Optional[str]:
+            try:
+                return self.calculate_file_hash(Path(file_info['path']))
+            except OSError:
+                return None
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for file_info, file_hash in zip(candidates, executor.map(safe_hash, candidates)):
+                file_info['size_bucket_hash'] = file_hash
+    
+    def handle_duplicates(self, duplicate_groups: List[np.ndarray]) -> List[np.ndarray]:
+        """Behandelt Duplikate (Index-Gruppen in results) nach der Strategie aus self.plan"""
         if not duplicate_groups:
             return []
         
         print(f"\n🔍 {self.stats['duplicates_found']} mögliche Duplikate gefunden!")
-        print("Wie möchtest Du mit Duplikaten umgehen?")
-        print("1. Behalte alle")
-        print("2. Behalte nur die neueste Version")
-        print("3. Behalte nur die größte Datei")
-        print("4. Manuell für jede Gruppe entscheiden")
-        print("5. Zeige Details der Duplikate")
-        
-        choice = input("\nDeine Wahl (1-5): ").strip()
-        
-        if choice == '1':
-            print("✅ Behalte alle Dateien")
-            return duplicate_groups
-        elif choice in ['2', '3']:
-            strategy = 'newest' if choice == '2' else 'largest'
-            filtered_groups = []
-            for group in duplicate_groups:
-                if strategy == 'newest':
-                    # Behalte neueste Datei
-                    newest = max(group, key=lambda x: x.get('modified', ''))
-                    filtered_groups.append([newest])
-                else:  # largest
-                    largest = max(group, key=lambda x: x.get('size_bytes', 0))
-                    filtered_groups.append([largest])
-            return filtered_groups
-        elif choice == '4':
-            return self.manual_duplicate_selection(duplicate_groups)
-        elif choice == '5':
+        strategy = self.plan.dup_strategy
+        
+        if strategy in ('newest', 'largest'):
+            # Behalte neueste bzw. größte Datei (Vergleich auf den Metadaten-Arrays)
+            values = self._meta['mtime'] if strategy == 'newest' else self._meta['size']
+            return [group[[np.argmax(values[group])]] for group in duplicate_groups]
+        elif strategy == 'manual' and self.config['interactive']:
             self.show_duplicate_details(duplicate_groups)
-            return self.handle_duplicates_interactive(duplicate_groups)
+            return self.manual_duplicate_selection(duplicate_groups)
         
+        print("✅ Behalte alle Dateien")
         return duplicate_groups
     
     def suggest_categories(self, files: List[Dict]) -> Dict:
@@ -272,22 +678,23 @@ class EnhancedFileOrganizer:
         max_cats = self.config['max_categories'][granularity]
         
         # Einfache kategorisierung basierend auf Dateityp und Inhalt
-        categories = {}
+        categories = defaultdict(list)
         
+        # Verfeinerung einmal vorab wählen; bei 'wenig' bleibt die Basiskategorie
+        if granularity == 'viel':
+            refine = self.get_detailed_category
+        elif granularity == 'mittel':
+            refine = self.get_medium_category
+        else:
+            refine = None
+        
+        get_base = self.get_base_category
         for file in files:
-            # Bestimme Basiskategorie
-            cat = self.get_base_category(file)
-            
-            # Verfeinere basierend auf Granularität
-            if granularity == 'viel':
-                cat = self.get_detailed_category(file, cat)
-            elif granularity == 'mittel':
-                cat = self.get_medium_category(file, cat)
-            # Bei 'wenig' bleibt die Basiskategorie
-            
-            if cat not in categories:
-                categories[cat] = []
+            cat = get_base(file)
+            if refine is not None:
+                cat = refine(file, cat)
             categories[cat].append(file)
+        categories = dict(categories)
         
         # Begrenze Anzahl der Kategorien
         if len(categories) > max_cats:
@@ -297,20 +704,7 @@ class EnhancedFileOrganizer:
     
     def get_base_category(self, file: Dict) -> str:
         """Bestimmt Basiskategorie"""
-        ext = file['extension']
-        
-        if ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp']:
-            return 'Bilder'
-        elif ext in ['.pdf', '.docx', '.doc', '.txt', '.md']:
-            return 'Dokumente'
-        elif ext in ['.mp3', '.wav', '.flac', '.mp4', '.avi', '.mov']:
-            return 'Medien'
-        elif ext in ['.py', '.c', '.cpp', '.java', '.js']:
-            return 'Code'
-        elif ext in ['.xlsx', '.xls', '.csv']:
-            return 'Tabellen'
-        else:
-            return 'Sonstiges'
+        return _EXT2CAT.get(file['extension'], 'Sonstiges')
     
     def get_medium_category(self, file: Dict, base_cat: str) -> str:
         """Mittlere Detaillierung"""
@@ -318,19 +712,24 @@ class EnhancedFileOrganizer:
             # Analysiere Bildinhalt für genauere Kategorie
             if 'analysis' in file and 'image' in file['analysis']:
                 img_info = file['analysis']['image']
-                if 'objects' in img_info:
-                    objects = img_info['objects']
-                    if any(obj in ['person', 'face'] for obj in objects):
+                # Bildanalyse liegt als dict oder als ImageAnalysisResult vor
+                if isinstance(img_info, dict):
+                    objects = img_info.get('objects')
+                else:
+                    objects = getattr(img_info, 'objects', None)
+                if objects:
+                    obj_set = set(objects)
+                    if obj_set & _PERSON_OBJECTS:
                         return 'Bilder/Personen'
-                    elif any(obj in ['car', 'bicycle', 'motorcycle'] for obj in objects):
+                    elif obj_set & _VEHICLE_OBJECTS:
                         return 'Bilder/Fahrzeuge'
-                    elif any(obj in ['tree', 'flower', 'plant'] for obj in objects):
+                    elif obj_set & _NATURE_OBJECTS:
                         return 'Bilder/Natur'
             
             # Ästhetik-basierte Kategorien
             if 'analysis' in file and 'aesthetic' in file['analysis']:
                 aesthetic_cat = file['analysis']['aesthetic'].get('category', '')
-                if aesthetic_cat in self.config['aesthetic_categories']:
+                if aesthetic_cat.lower() in self.aesthetic_categories:
                     return f'Bilder/{aesthetic_cat.capitalize()}'
         
         return base_cat
@@ -342,27 +741,26 @@ class EnhancedFileOrganizer:
     
     def merge_similar_categories(self, categories: Dict, max_cats: int) -> Dict:
         """Vereint ähnliche Kategorien"""
-        # Einfache Implementierung: Behalte die größten Kategorien
-        sorted_cats = sorted(categories.items(), key=lambda x: len(x[1]), reverse=True)
-        merged = {}
-        for cat, files in sorted_cats[:max_cats]:
-            merged[cat] = files
-        # Rest in "Sonstiges"
-        if len(sorted_cats) > max_cats:
-            if 'Sonstiges' not in merged:
-                merged['Sonstiges'] = []
-            for cat, files in sorted_cats[max_cats:]:
-                merged['Sonstiges'].extend(files)
+        # Einfache Implementierung: Behalte die größten Kategorien (Top-K per Heap statt Vollsortierung)
+        merged = dict(heapq.nlargest(max_cats, categories.items(), key=lambda kv: len(kv[1])))
+        # Rest in "Sonstiges" (Reihenfolge der Eingabe bleibt erhalten)
+        leftover_keys = categories.keys() - merged.keys()
+        if leftover_keys:
+            rest = merged.setdefault('Sonstiges', [])
+            for cat, files in categories.items():
+                if cat in leftover_keys:
+                    rest.extend(files)
         return merged
     
-    def manual_duplicate_selection(self, duplicate_groups: List[List[Dict]]) -> List[List[Dict]]:
+    def manual_duplicate_selection(self, duplicate_groups: List[np.ndarray]) -> List[np.ndarray]:
         """Manuelle Auswahl für jede Duplikatgruppe"""
         filtered = []
         for i, group in enumerate(duplicate_groups, 1):
             print(f"\nGruppe {i} ({len(group)} Dateien):")
-            for j, file in enumerate(group, 1):
+            for j, file_idx in enumerate(group, 1):
+                file = self._results[file_idx]
                 size_mb = file['size_bytes'] / 1024 / 1024
-                modified = file['modified'][:10]
+                modified = format_mtime(file['mtime_ns'])
                 print(f"  {j}. {file['filename']} ({size_mb:.1f} MB, {modified})")
             
             while True:
@@ -373,7 +771,7 @@ class EnhancedFileOrganizer:
                 try:
                     idx = int(choice) - 1
                     if 0 <= idx < len(group):
-                        filtered.append([group[idx]])
+                        filtered.append(group[idx:idx + 1])
                         break
                 except ValueError:
                     print("❌ Ungültige Eingabe.")
@@ -385,7 +783,7 @@ class EnhancedFileOrganizer:
         print("\n📦 Organisiere Dateien...")
         
         # Frage nach Bestätigung
-        if self.config['interactive']:
+        if self.config['interactive'] and not self.plan.auto_categories:
             print(f"\nGefundene Kategorien ({len(analysis['categories'])}):")
             for cat, files in analysis['categories'].items():
                 print(f"  📁 {cat}: {len(files)} Dateien")
@@ -402,8 +800,9 @@ class EnhancedFileOrganizer:
         # Dateien organisieren
         moved_count = 0
         for category, files in analysis['categories'].items():
-            target_dir = self.config['output_dir'] / self.clean_category_name(category)
+            target_dir = self.config['output_dir'] / clean_category_name(category)
             target_dir.mkdir(parents=True, exist_ok=True)
+            target_dev = target_dir.stat().st_dev
             
             for file_info in files:
                 source_path = Path(file_info['path'])
@@ -414,32 +813,25 @@ class EnhancedFileOrganizer:
                 else:
                     new_name = source_path.name
                 
-                target_path = target_dir / new_name
-                
-                # Sicherheitscheck
-                if target_path.exists():
-                    # Erstelle eindeutigen Namen
-                    counter = 1
-                    while target_path.exists():
-                        name_parts = new_name.rsplit('.', 1)
-                        if len(name_parts) == 2:
-                            target_path = target_dir / f"{name_parts[0]}_{counter}.{name_parts[1]}"
-                        else:
-                            target_path = target_dir / f"{new_name}_{counter}"
-                        counter += 1
-                
+                target_path = None
                 try:
+                    # Eindeutigen Zielnamen reservieren (keine Kollision, kein Wettlauf)
+                    target_path = reserve_target_path(target_dir, new_name)
+                    
                     # Vorschau anzeigen
                     if self.config['preview_before_move']:
                         print(f"  📄 {source_path.name} → {target_path.name}")
                     
-                    # Datei verschieben
-                    shutil.move(str(source_path), str(target_path))
+                    # Datei verschieben (ersetzt den Platzhalter; über Laufwerksgrenzen per Kopie)
+                    _fast_move(source_path, target_path, target_dev)
                     moved_count += 1
                     
                 except Exception as e:
                     print(f"  ✗ Fehler bei {source_path.name}: {e}")
                     self.stats['errors'] += 1
+                    # Leeren Platzhalter wieder entfernen
+                    if target_path is not None and source_path.exists():
+                        target_path.unlink(missing_ok=True)
         
         self.stats['organized'] = moved_count
         return True
@@ -455,7 +847,7 @@ class EnhancedFileOrganizer:
             
             # Versuche, aus Inhalt zu generieren
             description = self.generate_description(file_info)
-            clean_desc = self.clean_string_for_filename(description)
+            clean_desc = clean_string_for_filename(description)
             
             # Kürze wenn nötig
             if len(clean_desc) > 50:
@@ -465,7 +857,7 @@ class EnhancedFileOrganizer:
             return f"{clean_desc}_{timestamp}{ext}"
         
         elif self.config['naming_scheme'] == 'timestamp':
-            timestamp = datetime.fromisoformat(file_info['modified']).strftime("%Y%m%d_%H%M%S")
+            timestamp = format_mtime(file_info['mtime_ns'], "%Y%m%d_%H%M%S")
             return f"{timestamp}_{original_name}{ext}"
         
         else:  # original_descriptive
@@ -493,31 +885,7 @@ class EnhancedFileOrganizer:
         
         return file_info['filename']
     
-    def clean_category_name(self, name: str) -> str:
-        """Bereinigt Kategorienamen für Dateisystem"""
-        # Ersetze ungültige Zeichen
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            name = name.replace(char, '_')
-        
-        # Entferne doppelte Unterstriche
-        while '__' in name:
-            name = name.replace('__', '_')
-        
-        return name.strip('_')
-    
-    def clean_string_for_filename(self, text: str) -> str:
-        """Bereinigt String für Dateinamen"""
-        # Entferne Sonderzeichen
-        import re
-        text = re.sub(r'[^\w\s-]', '', text)
-        # Ersetze Leerzeichen mit Unterstrichen
-        text = text.replace(' ', '_')
-        # Mehrfache Unterstriche entfernen
-        text = re.sub(r'_+', '_', text)
-        return text.strip('_').lower()
-    
-    def show_duplicate_details(self, duplicate_groups: List[List[Dict]]):
+    def show_duplicate_details(self, duplicate_groups: List[np.ndarray]):
         """Zeigt Details der Duplikate"""
         print("\n" + "="*60)
         print("🔍 DUPLIKAT-DETAILS")
@@ -525,9 +893,10 @@ class EnhancedFileOrganizer:
         
         for i, group in enumerate(duplicate_groups[:5], 1):  # Zeige nur erste 5 Gruppen
             print(f"\nGruppe {i} ({len(group)} Dateien):")
-            for file in group:
+            for file_idx in group:
+                file = self._results[file_idx]
                 size_mb = file['size_bytes'] / 1024 / 1024
-                modified = file['modified'][:10]
+                modified = format_mtime(file['mtime_ns'])
                 print(f"  • {file['filename']} ({size_mb:.1f} MB, {modified})")
         
         if len(duplicate_groups) > 5:
@@ -557,18 +926,21 @@ class EnhancedFileOrganizer:
         print("🤖 ERWEITERTER DATEI-ORGANIZER")
         print("="*60)
         
-        # Granularität fragen
-        if self.config['interactive']:
-            self.config['category_granularity'] = self.ask_category_granularity()
+        # Verzeichnis im Hintergrund scannen, während die Fragen beantwortet werden
+        with ThreadPoolExecutor(max_workers=1) as scanner:
+            scan = scanner.submit(self.scan_files)
+            if self.config['interactive']:
+                self.ask_plan()
+            all_files = scan.result()
         
         # Analyse durchführen
-        analysis = self.analyze_files()
+        analysis = self.analyze_files(all_files)
         
         # Zusammenfassung
         self.show_organization_details(analysis)
         
         # Organisieren (falls gewünscht)
-        if self.config['interactive']:
+        if self.config['interactive'] and not self.plan.auto_categories:
             proceed = input("\n📋 Mit Organisation fortfahren? (ja/nein): ").lower()
             if proceed != 'ja':
                 print("❌ Abgebrochen.")
@@ -599,8 +971,7 @@ class EnhancedFileOrganizer:
             'duplicates_found': analysis['stats']['duplicates_found']
         }
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        report_path.write_bytes(orjson.dumps(report, default=_json_default, option=REPORT_JSON_OPTIONS))
         
         print(f"\n📝 Detaillierter Bericht gespeichert: {report_path}")
 
@@ -612,7 +983,11 @@ class EnhancedFileOrganizer:
               help='Kategoriengranularität')
 @click.option('--rename/--no-rename', default=True, help='Dateien umbenennen')
 @click.option('--interactive/--non-interactive', default=True, help='Interaktiver Modus')
-def main(input, output, config, granularity, rename, interactive):
+@click.option('--cache/--no-cache', default=True, help='Analyse-Cache verwenden')
+@click.option('--dup-strategy', type=click.Choice(['ask', 'keep-all', 'newest', 'largest', 'manual']),
+              help='Umgang mit Duplikaten')
+@click.option('--auto-categories', is_flag=True, help='Kategorien ohne Bestätigung übernehmen')
+def main(input, output, config, granularity, rename, interactive, cache, dup_strategy, auto_categories):
     """Erweiterter Datei-Organizer mit allen Funktionen"""
     
     # Konfiguration laden
@@ -630,12 +1005,18 @@ def main(input, output, config, granularity, rename, interactive):
         overrides['rename_files'] = rename
     if interactive is not None:
         overrides['interactive'] = interactive
+    if cache is not None:
+        overrides['use_analysis_cache'] = cache
+    if dup_strategy:
+        overrides['duplicate_handling'] = dup_strategy
+    if auto_categories:
+        overrides['auto_categories'] = True
     
     # Temporäre Konfigurationsdatei erstellen
     if overrides:
         import tempfile
-        temp_config = tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False)
-        json.dump(overrides, temp_config)
+        temp_config = tempfile.NamedTemporaryFile(mode='wb', suffix='.json', delete=False)
+        temp_config.write(orjson.dumps(overrides, default=_json_default))
         temp_config.close()
         config_path = Path(temp_config.name)
     
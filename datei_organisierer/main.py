@@ -288,7 +288,8 @@ class EnhancedFileOrganizer:
                 self.stats['errors'] += 1
         
         # Duplikate finden
-        duplicate_groups = self.duplicate_detector.find_duplicates(results)
+        duplicate_groups = [[results[i] for i in group]
+                            for group in self.duplicate_detector.find_duplicates(results)]
         self.stats['duplicates_found'] = sum(len(group) for group in duplicate_groups)
         
         # Ästhetische Dateien
@@ -311,13 +312,14 @@ class EnhancedFileOrganizer:
     
     def analyze_single_file(self, file_path: Path) -> Dict:
         """Analysiert eine einzelne Datei mit allen Funktionen"""
+        st = file_path.stat()
         file_info = {
             'path': str(file_path),
             'filename': file_path.name,
             'extension': file_path.suffix.lower(),
-            'size_bytes': file_path.stat().st_size,
-            'modified': datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-            'created': datetime.fromtimestamp(file_path.stat().st_ctime).isoformat(),
+            'size_bytes': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'ctime_ns': st.st_ctime_ns,
             'hash': self.calculate_file_hash(file_path),
             'content_preview': '',
             'metadata': {},
@@ -406,7 +408,7 @@ class EnhancedFileOrganizer:
             filtered_groups = []
             for group in duplicate_groups:
                 if strategy == 'newest':
-                    newest = max(group, key=lambda x: x.get('modified', ''))
+                    newest = max(group, key=lambda x: x.get('mtime_ns', 0))
                     filtered_groups.append([newest])
                 else:
                     largest = max(group, key=lambda x: x.get('size_bytes', 0))
@@ -427,7 +429,7 @@ class EnhancedFileOrganizer:
             print(f"\nGruppe {i} ({len(group)} Dateien):")
             for j, file in enumerate(group, 1):
                 size_mb = file['size_bytes'] / 1024 / 1024
-                modified = file['modified'][:10]
+                modified = datetime.fromtimestamp(file['mtime_ns'] / 1e9).strftime('%Y-%m-%d')
                 print(f"  {j}. {file['filename']} ({size_mb:.1f} MB, {modified})")
             
             while True:
@@ -541,7 +543,7 @@ class EnhancedFileOrganizer:
             print(f"\nGruppe {i} ({len(group)} Dateien):")
             for file in group:
                 size_mb = file['size_bytes'] / 1024 / 1024
-                modified = file['modified'][:10]
+                modified = datetime.fromtimestamp(file['mtime_ns'] / 1e9).strftime('%Y-%m-%d')
                 print(f"  • {file['filename']} ({size_mb:.1f} MB, {modified})")
         
         if len(duplicate_groups) > 5:
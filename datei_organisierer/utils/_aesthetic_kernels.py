@@ -0,0 +1,91 @@
+"""
+Numba-Kernel für die einfache Bildanalyse (benötigt numba)
+
+Helligkeit, Kontrast, Schärfe und Farbvarianz in einem Durchlauf über das
+BGR-Bild statt getrennter OpenCV/NumPy-Durchläufe mit Zwischenbildern.
+Graustufen und Hue folgen den 8-Bit-Formeln von cv2.cvtColor, der Laplace
+dem Standard-Kern von cv2.Laplacian (ksize=1, Rand BORDER_REFLECT_101).
+"""
+
+from typing import Tuple
+
+import numpy as np
+from numba import njit, prange, types
+
+
+@njit(inline='always')
+def _gray(bgr, y, x):
+    """Graustufenwert wie COLOR_BGR2GRAY (gerundet auf uint8-Stufen)"""
+    return np.floor(0.114 * bgr[y, x, 0] + 0.587 * bgr[y, x, 1] + 0.299 * bgr[y, x, 2] + 0.5)
+
+
+@njit(inline='always')
+def _hue(b, g, r):
+    """Hue wie COLOR_BGR2HSV für 8-Bit-Bilder (0-179)"""
+    v = max(b, g, r)
+    diff = v - min(b, g, r)
+    if diff == 0.0:
+        return 0.0
+    if v == r:
+        h = 30.0 * (g - b) / diff
+    elif v == g:
+        h = 60.0 + 30.0 * (b - r) / diff
+    else:
+        h = 120.0 + 30.0 * (r - g) / diff
+    if h < 0.0:
+        h += 180.0
+    return np.floor(h + 0.5)
+
+
+@njit(types.UniTuple(types.float64, 4)(types.uint8[:, :, :]),
+      cache=True, parallel=True, fastmath=True)
+def _compute_stats(bgr: np.ndarray) -> Tuple[float, float, float, float]:
+    """
+    Berechnet (brightness, contrast, sharpness, color_variance) wie
+    AestheticScorer._simple_image_analysis, normalisiert auf 0-1
+    """
+    height, width = bgr.shape[0], bgr.shape[1]
+    n = height * width
+
+    gray_sum = 0.0
+    gray_sq = 0.0
+    lap_sum = 0.0
+    lap_sq = 0.0
+    hue_sum = 0.0
+    hue_sq = 0.0
+
+    for y in prange(height):
+        # Nachbarzeilen mit Spiegelung am Rand (BORDER_REFLECT_101)
+        y_up = y - 1 if y > 0 else min(1, height - 1)
+        y_down = y + 1 if y < height - 1 else max(height - 2, 0)
+
+        for x in range(width):
+            x_left = x - 1 if x > 0 else min(1, width - 1)
+            x_right = x + 1 if x < width - 1 else max(width - 2, 0)
+
+            g = _gray(bgr, y, x)
+            gray_sum += g
+            gray_sq += g * g
+
+            lap = (_gray(bgr, y_up, x) + _gray(bgr, y_down, x) +
+                   _gray(bgr, y, x_left) + _gray(bgr, y, x_right) - 4.0 * g)
+            lap_sum += lap
+            lap_sq += lap * lap
+
+            h = _hue(float(bgr[y, x, 0]), float(bgr[y, x, 1]), float(bgr[y, x, 2]))
+            hue_sum += h
+            hue_sq += h * h
+
+    gray_mean = gray_sum / n
+    gray_var = max(0.0, gray_sq / n - gray_mean * gray_mean)
+    lap_mean = lap_sum / n
+    lap_var = max(0.0, lap_sq / n - lap_mean * lap_mean)
+    hue_mean = hue_sum / n
+    hue_var = max(0.0, hue_sq / n - hue_mean * hue_mean)
+
+    brightness = gray_mean / 255.0
+    contrast = np.sqrt(gray_var) / 255.0
+    # Normalisierung wie _calculate_sharpness / _calculate_color_variance
+    sharpness = min(1.0, lap_var / 1000.0)
+    color_variance = min(1.0, hue_var / 10000.0)
+    return brightness, contrast, sharpness, color_variance
@@ -2,17 +2,58 @@
 Ästhetik-Bewertung für Bilder - Verbesserte Version
 """
 
+import os
+import heapq
+import pickle
 import cv2
 import numpy as np
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, TypedDict
+from typing import ClassVar, Dict, FrozenSet, Iterator, List, Optional, Tuple, TypedDict, Union
 from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    from utils._aesthetic_kernels import _compute_stats
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+
+try:
+    CUDA_AVAILABLE = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    CUDA_AVAILABLE = False
 
 # Logging konfigurieren
 logger = logging.getLogger(__name__)
 
+# Ab dieser Dateigröße mit 1/8 Auflösung dekodieren (JPEG: Skalierung in der IDCT)
+REDUCED_DECODE_MIN_BYTES = 200_000
+
+# Arbeitsgröße für alle Metriken der einfachen Bildanalyse
+ANALYSIS_SIZE = (128, 128)
+
+# Gewichtung der Metriken in der einfachen Bildanalyse
+SIMPLE_WEIGHTS = {
+    'brightness': 0.25,
+    'contrast': 0.35,
+    'sharpness': 0.20,
+    'color_variance': 0.20
+}
+
+# Bilder pro GPU-Upload
+GPU_BATCH_SIZE = 256
+
 
 @dataclass
 class ImageAnalysis:
@@ -26,6 +67,20 @@ class ImageAnalysis:
     dominant_colors: Optional[List[Dict]] = None
 
 
+@dataclass(slots=True, frozen=True)
+class Thresholds:
+    """Schwellwerte der Ästhetik-Bewertung (Attributzugriff statt dict-Lookup)"""
+    brightness_optimal_min: float = 0.4
+    brightness_optimal_max: float = 0.7
+    brightness_poor_min: float = 0.2
+    brightness_poor_max: float = 0.9
+    contrast_optimal_min: float = 0.3
+    contrast_optimal_max: float = 0.7
+    contrast_good_min: float = 0.8
+    min_colors: int = 2
+    max_colors: int = 5
+
+
 class AestheticCategory(TypedDict):
     """TypedDict für Ästhetik-Kategorien"""
     name: str
@@ -33,95 +88,315 @@ class AestheticCategory(TypedDict):
     max_score: float
 
 
+# Eingangsgrößen des Ästhetik-Scores je Bild (für die vektorisierte Batch-Bewertung);
+# float32 genügt für Eingaben im Bereich 0-1 (die Scores selbst bleiben float64)
+SCORE_INPUT_DTYPE = np.dtype([
+    ('brightness', 'f4'), ('contrast', 'f4'), ('faces', 'i4'),
+    ('objects_count', 'i4'), ('colors_count', 'i4'), ('desc_words', 'i4')
+])
+
+def _rate_brightness(brightness):
+    """Bewertet Helligkeit mit kontinuierlicher Funktion"""
+    # Glockenförmige Kurve um optimalen Bereich (0.55)
+    if 0.4 <= brightness <= 0.7:
+        # Optimaler Bereich: maximale Punkte
+        return 0.2
+    elif 0.35 <= brightness < 0.4 or 0.7 < brightness <= 0.75:
+        # Noch guter Bereich
+        return 0.1
+    elif 0.2 <= brightness < 0.35 or 0.75 < brightness <= 0.85:
+        # Akzeptabler Bereich
+        return 0.0
+    else:
+        # Zu dunkel oder zu hell
+        return -0.1
+
+def _rate_contrast(contrast):
+    """Bewertet Kontrast"""
+    if 0.3 <= contrast <= 0.7:
+        return 0.2
+    elif 0.7 < contrast <= 0.85:
+        return 0.1
+    elif 0.15 <= contrast < 0.3:
+        return 0.0
+    else:
+        return -0.05
+
+def _score_core(brightness, contrast, faces, unique_objects, color_count, desc_words,
+                min_colors, max_colors):
+    """Rechenkern des Ästhetik-Scores (nur Zahlen, damit Numba ihn kompilieren kann)"""
+    score = 0.5  # Basis-Score
+    
+    # Helligkeit und Kontrast
+    score += _rate_brightness(brightness)
+    score += _rate_contrast(contrast)
+    
+    # Objekte vorhanden (zeigt Komposition): je mehr verschiedene, desto interessanter
+    if unique_objects > 0:
+        score += min(0.15, unique_objects * 0.03)
+    
+    # Gesichter (oft interessant): mehr Gesichter = interessantere Szene
+    if faces > 0:
+        score += min(0.1, faces * 0.05)
+    
+    # Farbvielfalt (optimale Anzahl von Farben)
+    if min_colors <= color_count <= max_colors:
+        score += 0.1
+    elif color_count > max_colors:
+        # Zu viele Farben können unruhig wirken
+        score -= 0.05
+    
+    # Längere, detailliertere Bildbeschreibung = bessere Qualität
+    if desc_words >= 3:
+        score += 0.05
+    
+    # Normalisiere Score auf 0-1
+    return min(1.0, max(0.0, score))
+
+if NUMBA_AVAILABLE:
+    _rate_brightness = njit(cache=True)(_rate_brightness)
+    _rate_contrast = njit(cache=True)(_rate_contrast)
+    _score_core = njit(cache=True)(_score_core)
+    
+    @njit(parallel=True, cache=True)
+    def _score_batch(brightness, contrast, faces, unique_objects, color_count, desc_words,
+                     min_colors, max_colors):
+        """Wendet _score_core parallel auf alle Bilder eines Batches an"""
+        n = brightness.shape[0]
+        scores = np.empty(n, dtype=np.float64)  # Scores wie score_file in float64 (Kategoriegrenzen)
+        for i in prange(n):
+            scores[i] = _score_core(brightness[i], contrast[i], faces[i], unique_objects[i],
+                                    color_count[i], desc_words[i], min_colors, max_colors)
+        return scores
+
+# Scorer-Instanz pro Worker-Prozess
+_WORKER_SCORER = None
+
+def _init_worker(config: Dict):
+    """Initialisiert einen Worker: OpenCV single-threaded, da die Prozesse parallel laufen"""
+    global _WORKER_SCORER
+    cv2.setNumThreads(1)
+    _WORKER_SCORER = AestheticScorer(config)
+
+def _score_in_worker(file_info: Dict) -> float:
+    """Bewertet eine Datei im Worker-Prozess"""
+    return _WORKER_SCORER._process_file_for_aesthetics(file_info)
+
+
 class AestheticScorer:
+    # Bewertet werden nur Bilder
+    _VALID_EXT: ClassVar[FrozenSet[str]] = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.gif', '.tiff'})
+    
     def __init__(self, config: Dict):
         self.config = config
         self.min_score = config.get('min_aesthetic_score', 0.7)
         self.categories = config.get('aesthetic_categories', [])
-        self.thresholds = {
-            'brightness_optimal_min': 0.4,
-            'brightness_optimal_max': 0.7,
-            'brightness_poor_min': 0.2,
-            'brightness_poor_max': 0.9,
-            'contrast_optimal_min': 0.3,
-            'contrast_optimal_max': 0.7,
-            'contrast_good_min': 0.8,
-            'min_colors': 2,
-            'max_colors': 5
-        }
+        self.thresholds = Thresholds()
+        
+        # Prozess-Pool nur auf Wunsch: OpenCV parallelisiert selbst (TBB/OpenMP), ein Pool
+        # darüber überbelegt die Kerne. Wird erst bei Bedarf gestartet.
+        self.use_process_pool = config.get('aesthetic_process_pool', False)
+        self.max_workers = os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        
+        # libjpeg-turbo für JPEGs (wird erst beim ersten JPEG geladen)
+        self._tj = None
+        self._tj_failed = not TURBOJPEG_AVAILABLE
+    
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                 initargs=(self.config,))
+        return self._executor
         
-        # Thread Pool für parallele Verarbeitung
-        self.executor = ThreadPoolExecutor(max_workers=4)
+    def score_file(self, file_path: Union[str, Path], file_info: Dict) -> float:
+        """Bewertet die ästhetische Qualität einer Datei (Ergebnis wird in file_info gemerkt)"""
+        # Bereits bewertet (z.B. bei der Einzelanalyse)
+        if 'aesthetic_score' in file_info:
+            return file_info['aesthetic_score']
         
-    def score_file(self, file_path: Path, file_info: Dict) -> float:
-        """Bewertet die ästhetische Qualität einer Datei"""
         # Nur für Bilder
-        valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.gif', '.tiff'}
-        if file_info.get('extension', '').lower() not in valid_extensions:
+        if file_info.get('extension', '').lower() not in self._VALID_EXT:
             return 0.0
         
         try:
             # Nutze bereits vorhandene Bildanalyse
             if 'analysis' in file_info and 'image' in file_info['analysis']:
                 img_analysis = file_info['analysis']['image']
-                return self._calculate_aesthetic_score(img_analysis)
+                score = self._calculate_aesthetic_score(img_analysis)
+            else:
+                # Fallback: Einfache Analyse (legt die Metriken auch in file_info ab)
+                score = self._simple_image_analysis(file_path, file_info)
             
-            # Fallback: Einfache Analyse
-            return self._simple_image_analysis(file_path)
+            file_info['aesthetic_score'] = score
+            return score
             
         except Exception as e:
             logger.warning(f"Fehler bei Ästhetik-Bewertung von {file_path}: {e}")
             return 0.0
     
-    def _simple_image_analysis(self, file_path: Path) -> float:
-        """Führt einfache Bildanalyse durch"""
+    def _decode_jpeg(self, file_path: str, reduced: bool) -> Optional[np.ndarray]:
+        """Dekodiert ein JPEG direkt mit libjpeg-turbo (None, falls nicht verfügbar oder fehlerhaft)"""
+        if self._tj_failed:
+            return None
+        if self._tj is None:
+            try:
+                self._tj = TurboJPEG()
+            except (OSError, RuntimeError) as e:
+                # Bibliothek fehlt (PyTurboJPEG meldet das als RuntimeError):
+                # nicht bei jedem Bild erneut suchen
+                logger.warning(f"libjpeg-turbo nicht nutzbar, verwende OpenCV: {e}")
+                self._tj_failed = True
+                return None
         try:
-            img = cv2.imread(str(file_path))
+            with open(file_path, 'rb') as f:
+                buf = f.read()
+            return self._tj.decode(buf, pixel_format=TJPF_BGR,
+                                   scaling_factor=(1, 8) if reduced else None)
+        except Exception:
+            return None
+    
+    def _load_small(self, file_path: Union[str, Path]) -> Optional[np.ndarray]:
+        """Lädt ein Bild verkleinert auf höchstens ANALYSIS_SIZE (None, falls nicht lesbar)"""
+        # Für grobe Statistiken genügt bei großen Bildern 1/8 Auflösung
+        file_path = os.fspath(file_path)  # Pfade liegen meist schon als str vor
+        reduced = os.stat(file_path).st_size > REDUCED_DECODE_MIN_BYTES
+        
+        img = None
+        if os.path.splitext(file_path)[1].lower() in ('.jpg', '.jpeg'):
+            img = self._decode_jpeg(file_path, reduced)
+        if img is None:
+            img = cv2.imread(file_path, cv2.IMREAD_REDUCED_COLOR_8 if reduced else cv2.IMREAD_COLOR)
+        if img is None:
+            logger.warning(f"Bild konnte nicht geladen werden: {file_path}")
+            return None
+        
+        # Einmal auf die Arbeitsgröße verkleinern (Flächenmittelung), alle Metriken darauf
+        if img.shape[1] > ANALYSIS_SIZE[0] or img.shape[0] > ANALYSIS_SIZE[1]:
+            img = cv2.resize(img, ANALYSIS_SIZE, interpolation=cv2.INTER_AREA)
+        return img
+    
+    def _combine_simple_metrics(self, brightness, contrast, sharpness, color_variance):
+        """Gewichtete Summe der einfachen Metriken (Skalare oder Arrays)"""
+        return (
+            brightness * SIMPLE_WEIGHTS['brightness'] +
+            contrast * SIMPLE_WEIGHTS['contrast'] +
+            sharpness * SIMPLE_WEIGHTS['sharpness'] +
+            color_variance * SIMPLE_WEIGHTS['color_variance']
+        )
+    
+    def _simple_image_analysis(self, file_path: Union[str, Path], file_info: Optional[Dict] = None) -> float:
+        """
+        Führt einfache Bildanalyse durch
+        
+        file_info: erhält die Metriken unter ['analysis']['image'], damit spätere
+        Schritte das Bild nicht erneut dekodieren müssen
+        """
+        try:
+            img = self._load_small(file_path)
             if img is None:
-                logger.warning(f"Bild konnte nicht geladen werden: {file_path}")
                 return 0.0
             
-            # Metriken berechnen
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            brightness = np.mean(gray) / 255.0
-            contrast = gray.std() / 255.0
-            
-            # Qualitätsmetriken (Scharfheit/Blur Detection)
-            sharpness = self._calculate_sharpness(gray)
-            
-            # Kombiniere Metriken mit Gewichtung
-            weights = {
-                'brightness': 0.25,
-                'contrast': 0.35,
-                'sharpness': 0.20,
-                'color_variance': 0.20
-            }
-            
-            # Farbvarianz berechnen
-            color_variance = self._calculate_color_variance(img)
+            if NUMBA_AVAILABLE and img.ndim == 3 and img.shape[2] == 3:
+                # Alle vier Metriken in einem Durchlauf über die Pixel
+                brightness, contrast, sharpness, color_variance = _compute_stats(img)
+            else:
+                # Metriken berechnen (Graustufen einmal, Mittelwert und Streuung in einem Durchlauf)
+                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+                mean, stddev = cv2.meanStdDev(gray)
+                brightness = float(mean[0, 0]) / 255.0
+                contrast = float(stddev[0, 0]) / 255.0
+                
+                # Qualitätsmetriken (Scharfheit/Blur Detection)
+                sharpness = self._calculate_sharpness(gray)
+                
+                # Farbvarianz berechnen
+                color_variance = self._calculate_color_variance(img)
             
-            # Gesamtscore berechnen
-            score = (
-                brightness * weights['brightness'] +
-                contrast * weights['contrast'] +
-                sharpness * weights['sharpness'] +
-                color_variance * weights['color_variance']
-            )
+            if file_info is not None:
+                file_info.setdefault('analysis', {})['image'] = {
+                    'brightness': brightness,
+                    'contrast': contrast,
+                    'sharpness': sharpness,
+                    'color_variance': color_variance,
+                    'colors': {}
+                }
             
-            # Normalisiere auf 0-1 Bereich
-            return np.clip(score, 0.0, 1.0)
+            # Gesamtscore berechnen, normalisiert auf 0-1 Bereich
+            score = self._combine_simple_metrics(brightness, contrast, sharpness, color_variance)
+            return min(1.0, max(0.0, score))
             
         except Exception as e:
             logger.error(f"Fehler bei einfacher Bildanalyse: {e}")
             return 0.0
     
+    def _gpu_batch_score(self, imgs: List[np.ndarray]) -> np.ndarray:
+        """
+        Einfache Bildanalyse für viele Bilder auf der GPU (cv2.cuda)
+        
+        Alle Bilder werden auf ANALYSIS_SIZE gebracht und untereinander in einen
+        GpuMat geladen; Graustufen, Hue und Laplace laufen in einem CUDA-Stream.
+        Zurückgeladen werden nur Zeilensummen von x und x² (je Kanal), die
+        Statistiken je Kachel entstehen daraus vektorisiert auf der CPU.
+        """
+        width, height = ANALYSIS_SIZE
+        stacked = np.vstack([
+            img if img.shape[:2] == (height, width)
+            else cv2.resize(img, ANALYSIS_SIZE, interpolation=cv2.INTER_AREA)
+            for img in imgs
+        ])
+        
+        stream = cv2.cuda.Stream()
+        gpu_img = cv2.cuda_GpuMat()
+        gpu_img.upload(stacked, stream=stream)
+        gpu_gray = cv2.cuda.cvtColor(gpu_img, cv2.COLOR_BGR2GRAY, stream=stream)
+        gpu_hsv = cv2.cuda.cvtColor(gpu_img, cv2.COLOR_BGR2HSV, stream=stream)
+        gpu_gray_f = gpu_gray.convertTo(cv2.CV_32F, stream=stream)
+        gpu_hue_f = cv2.cuda.split(gpu_hsv, stream=stream)[0].convertTo(cv2.CV_32F, stream=stream)
+        # Der CUDA-Laplace liefert nur den Eingangstyp (kein CV_8U -> CV_16S), daher float
+        laplace = cv2.cuda.createLaplacianFilter(cv2.CV_32FC1, cv2.CV_32FC1)
+        gpu_lap = laplace.apply(gpu_gray_f, stream=stream)
+        
+        def row_sums(gpu_mat):
+            """Zeilensummen von x und x² (auf der GPU reduziert, Download nur eine Spalte)"""
+            sums = cv2.cuda.reduce(gpu_mat, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32F, stream=stream)
+            squares = cv2.cuda.reduce(cv2.cuda.sqr(gpu_mat, stream=stream), 1, cv2.REDUCE_SUM,
+                                      dtype=cv2.CV_32F, stream=stream)
+            return sums.download(stream=stream), squares.download(stream=stream)
+        
+        gray_sums = row_sums(gpu_gray_f)
+        hue_sums = row_sums(gpu_hue_f)
+        lap_sums = row_sums(gpu_lap)
+        stream.waitForCompletion()
+        
+        # Je Bild height Zeilen (Kacheln liegen untereinander)
+        n = len(imgs)
+        pixels = width * height
+        
+        def mean_var(sums):
+            total, total_sq = (x.reshape(n, height).sum(axis=1, dtype=np.float64) for x in sums)
+            mean = total / pixels
+            return mean, np.maximum(0.0, total_sq / pixels - mean * mean)
+        
+        gray_mean, gray_var = mean_var(gray_sums)
+        brightness = gray_mean / 255.0
+        contrast = np.sqrt(gray_var) / 255.0
+        sharpness = np.minimum(1.0, mean_var(lap_sums)[1] / 1000.0)
+        color_variance = np.minimum(1.0, mean_var(hue_sums)[1] / 10000.0)
+        
+        score = self._combine_simple_metrics(brightness, contrast, sharpness, color_variance)
+        return np.clip(score, 0.0, 1.0)
+    
     def _calculate_sharpness(self, gray_image: np.ndarray) -> float:
         """Berechnet die Schärfe des Bildes (Laplace Variance)"""
         try:
-            laplacian = cv2.Laplacian(gray_image, cv2.CV_64F)
-            sharpness = laplacian.var()
+            # CV_16S reicht für uint8-Eingaben (2 statt 8 Byte pro Pixel), Varianz in einem Durchlauf
+            laplacian = cv2.Laplacian(gray_image, cv2.CV_16S)
+            _, stddev = cv2.meanStdDev(laplacian)
+            sharpness = stddev[0, 0] ** 2
             # Normalisiere auf 0-1 Skala (empirische Werte)
-            return np.clip(sharpness / 1000.0, 0.0, 1.0)
+            return min(1.0, max(0.0, float(sharpness) / 1000.0))
         except:
             return 0.5
     
@@ -130,94 +405,78 @@ class AestheticScorer:
         try:
             # In HSV konvertieren für bessere Farbanalyse
             hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-            # Varianz im Hue-Kanal
-            hue_variance = np.var(hsv[:,:,0])
+            # Varianz im Hue-Kanal (meanStdDev rechnet je Kanal, ohne Kopie des Hue-Slices)
+            _, stddev = cv2.meanStdDev(hsv)
+            hue_variance = stddev[0, 0] ** 2
             # Normalisiere (empirischer Wert)
-            return np.clip(hue_variance / 10000.0, 0.0, 1.0)
+            return min(1.0, max(0.0, float(hue_variance) / 10000.0))
         except:
             return 0.5
     
-    def _calculate_aesthetic_score(self, img_analysis: Dict) -> float:
+    def _score_inputs(self, img_analysis) -> tuple:
+        """Extrahiert die Eingangsgrößen (Reihenfolge wie SCORE_INPUT_DTYPE) aus einer Bildanalyse"""
+        # Bildanalyse liegt als dict oder als ImageAnalysisResult vor
+        if isinstance(img_analysis, dict):
+            get = img_analysis.get
+        else:
+            get = lambda key, default=None: getattr(img_analysis, key, default)
+        
+        objects = get('objects') or []
+        description = get('description') or ''
+        return (
+            float(get('brightness', 0.5)),
+            float(get('contrast', 0.5)),
+            int(get('faces', 0) or 0),
+            len(set(objects[:5])),  # Max 5 Objekte betrachten
+            len(get('colors') or {}),
+            len(description.split())
+        )
+    
+    def _calculate_aesthetic_score(self, img_analysis) -> float:
         """Berechnet ästhetischen Score aus Bildanalyse"""
         try:
             # Extrahiere Werte mit Defaults
-            brightness = float(img_analysis.get('brightness', 0.5))
-            contrast = float(img_analysis.get('contrast', 0.5))
-            objects = img_analysis.get('objects', [])
-            faces = int(img_analysis.get('faces', 0))
-            colors = img_analysis.get('colors', {})
-            
-            score = 0.5  # Basis-Score
-            
-            # Helligkeits-Bewertung (kontinuierliche Funktion)
-            brightness_score = self._rate_brightness(brightness)
-            score += brightness_score
-            
-            # Kontrast-Bewertung
-            contrast_score = self._rate_contrast(contrast)
-            score += contrast_score
-            
-            # Objekte vorhanden (zeigt Komposition)
-            if objects and len(objects) > 0:
-                # Je mehr verschiedene Objekte, desto interessanter die Komposition
-                unique_objects = len(set(objects[:5]))  # Max 5 Objekte betrachten
-                object_score = min(0.15, unique_objects * 0.03)
-                score += object_score
-            
-            # Gesichter (oft interessant)
-            if faces > 0:
-                # Mehr Gesichter = interessantere Szene
-                face_score = min(0.1, faces * 0.05)
-                score += face_score
-            
-            # Farbvielfalt (optimale Anzahl von Farben)
-            color_count = len(colors)
-            if self.thresholds['min_colors'] <= color_count <= self.thresholds['max_colors']:
-                score += 0.1
-            elif color_count > self.thresholds['max_colors']:
-                # Zu viele Farben können unruhig wirken
-                score -= 0.05
-            
-            # Bildbeschreibung berücksichtigen (falls vorhanden)
-            if 'description' in img_analysis and img_analysis['description']:
-                # Längere, detailliertere Beschreibung = bessere Qualität
-                desc_length = len(img_analysis['description'].split())
-                if desc_length >= 3:
-                    score += 0.05
-            
-            # Normalisiere Score auf 0-1
-            return np.clip(score, 0.0, 1.0)
-            
+            thresholds = self.thresholds
+            return _score_core(*self._score_inputs(img_analysis),
+                               thresholds.min_colors, thresholds.max_colors)
         except Exception as e:
             logger.error(f"Fehler bei Ästhetik-Score-Berechnung: {e}")
             return 0.5
     
-    def _rate_brightness(self, brightness: float) -> float:
-        """Bewertet Helligkeit mit kontinuierlicher Funktion"""
-        # Glockenförmige Kurve um optimalen Bereich (0.55)
-        if 0.4 <= brightness <= 0.7:
-            # Optimaler Bereich: maximale Punkte
-            return 0.2
-        elif 0.35 <= brightness < 0.4 or 0.7 < brightness <= 0.75:
-            # Noch guter Bereich
-            return 0.1
-        elif 0.2 <= brightness < 0.35 or 0.75 < brightness <= 0.85:
-            # Akzeptabler Bereich
-            return 0.0
-        else:
-            # Zu dunkel oder zu hell
-            return -0.1
-    
-    def _rate_contrast(self, contrast: float) -> float:
-        """Bewertet Kontrast"""
-        if 0.3 <= contrast <= 0.7:
-            return 0.2
-        elif 0.7 < contrast <= 0.85:
-            return 0.1
-        elif 0.15 <= contrast < 0.3:
-            return 0.0
-        else:
-            return -0.05
+    def batch_calculate_aesthetic_score(self, arr: np.ndarray) -> np.ndarray:
+        """Berechnet den Score für viele Bilder auf einmal (arr: Array mit SCORE_INPUT_DTYPE)"""
+        min_colors = self.thresholds.min_colors
+        max_colors = self.thresholds.max_colors
+        if NUMBA_AVAILABLE:
+            return _score_batch(
+                *(np.ascontiguousarray(arr[name]) for name in SCORE_INPUT_DTYPE.names),
+                min_colors, max_colors
+            )
+        
+        b = arr['brightness']
+        c = arr['contrast']
+        faces = arr['faces']
+        colors = arr['colors_count']
+        
+        # Ohne Numba: gleiche Stufen wie _rate_brightness / _rate_contrast, als Array-Ausdruck
+        brightness_score = np.select(
+            [(0.4 <= b) & (b <= 0.7),
+             ((0.35 <= b) & (b < 0.4)) | ((0.7 < b) & (b <= 0.75)),
+             ((0.2 <= b) & (b < 0.35)) | ((0.75 < b) & (b <= 0.85))],
+            [0.2, 0.1, 0.0], default=-0.1
+        )
+        contrast_score = np.select(
+            [(0.3 <= c) & (c <= 0.7), (0.7 < c) & (c <= 0.85), (0.15 <= c) & (c < 0.3)],
+            [0.2, 0.1, 0.0], default=-0.05
+        )
+        
+        score = 0.5 + brightness_score + contrast_score
+        score += np.minimum(0.15, arr['objects_count'] * 0.03)
+        score += np.where(faces > 0, np.minimum(0.1, faces * 0.05), 0.0)
+        score += np.where((min_colors <= colors) & (colors <= max_colors), 0.1,
+                          np.where(colors > max_colors, -0.05, 0.0))
+        score += np.where(arr['desc_words'] >= 3, 0.05, 0.0)
+        return np.clip(score, 0.0, 1.0)
     
     def get_aesthetic_category(self, score: float) -> str:
         """Gibt Kategorie basierend auf Score zurück"""
@@ -235,36 +494,64 @@ class AestheticScorer:
                 return 'interessant'
         return ''
     
-    def find_aesthetic_files(self, results: List[Dict]) -> List[Dict]:
-        """Findet alle ästhetisch interessanten Dateien (parallelisiert)"""
+    def _iter_scores(self, image_results: List[Dict]) -> Iterator[Tuple[Dict, float]]:
+        """Liefert (file_info, Score) nacheinander; bereits bewertete Dateien ohne den Pool"""
+        pending = []
+        for file_info in image_results:
+            if 'aesthetic_score' in file_info:
+                yield file_info, file_info['aesthetic_score']
+            else:
+                pending.append(file_info)
+        if not pending:
+            return
+        
+        # Standard: seriell, OpenCV nutzt intern alle Kerne
+        if not self.use_process_pool:
+            cv2.setNumThreads(-1)
+            for file_info in pending:
+                yield file_info, self._process_file_for_aesthetics(file_info)
+            return
+        
+        # Parallele Verarbeitung in Prozessen, mehrere Dateien pro Auftrag
+        chunksize = max(1, len(pending) // (4 * self.max_workers))
+        done = 0
+        try:
+            for file_info, score in zip(pending, self.executor.map(_score_in_worker, pending,
+                                                                   chunksize=chunksize)):
+                done += 1
+                yield file_info, score
+        except (BrokenProcessPool, pickle.PicklingError) as e:
+            logger.warning(f"Prozess-Pool nicht nutzbar ({e}), bewerte seriell")
+            for file_info in pending[done:]:
+                yield file_info, self._process_file_for_aesthetics(file_info)
+    
+    def find_aesthetic_files(self, results: List[Dict], top_k: Optional[int] = None) -> List[Dict]:
+        """Findet alle ästhetisch interessanten Dateien (parallelisiert), optional nur die top_k besten"""
         aesthetic_files = []
         
-        # Parallele Verarbeitung
-        futures = []
-        for file_info in results:
-            future = self.executor.submit(self._process_file_for_aesthetics, file_info)
-            futures.append((future, file_info))
+        # Nur Bilder bewerten
+        image_results = [file_info for file_info in results
+                         if file_info.get('extension', '').lower() in self._VALID_EXT]
         
-        for future, file_info in futures:
-            try:
-                score = future.result(timeout=5.0)
-                if score >= self.min_score:
-                    file_info['aesthetic_score'] = score
-                    file_info['aesthetic_category'] = self.get_aesthetic_category(score)
-                    aesthetic_files.append(file_info)
-            except Exception as e:
-                logger.warning(f"Fehler bei paralleler Verarbeitung: {e}")
+        # Ergebnisse direkt beim Eintreffen filtern (keine Zwischenliste aller Scores)
+        for file_info, score in self._iter_scores(image_results):
+            if score >= self.min_score:
+                file_info['aesthetic_score'] = score
+                file_info['aesthetic_category'] = self.get_aesthetic_category(score)
+                aesthetic_files.append(file_info)
         
-        # Sortiere nach Score (absteigend)
-        aesthetic_files.sort(key=lambda x: x.get('aesthetic_score', 0), reverse=True)
+        # Sortiere nach Score (absteigend) - einmal am Ende bzw. nur die besten k
+        score_key = lambda x: x['aesthetic_score']
+        if top_k is not None:
+            return heapq.nlargest(top_k, aesthetic_files, key=score_key)
+        aesthetic_files.sort(key=score_key, reverse=True)
         
         return aesthetic_files
     
     def _process_file_for_aesthetics(self, file_info: Dict) -> float:
         """Verarbeitet Datei für Ästhetik-Bewertung"""
         try:
-            file_path = Path(file_info['path'])
-            return self.score_file(file_path, file_info)
+            return self.score_file(file_info['path'], file_info)
         except Exception as e:
             logger.warning(f"Fehler bei Verarbeitung von {file_info.get('filename')}: {e}")
             return 0.0
@@ -280,10 +567,29 @@ class AestheticScorer:
             'other': []
         }
         
+        # Dateien mit vorhandener Bildanalyse vektorisiert in einem Schritt bewerten
+        pending = [file_info for file_info in files
+                   if 'aesthetic_score' not in file_info and 'image' in file_info.get('analysis', {})]
+        if pending:
+            try:
+                arr = np.array([self._score_inputs(file_info['analysis']['image']) for file_info in pending],
+                               dtype=SCORE_INPUT_DTYPE)
+                for file_info, score in zip(pending, self.batch_calculate_aesthetic_score(arr)):
+                    file_info['aesthetic_score'] = float(score)
+            except Exception as e:
+                logger.warning(f"Vektorisierte Bewertung fehlgeschlagen, bewerte einzeln: {e}")
+        
+        # Bilder ohne Analyse: einfache Bildanalyse in GPU-Batches (falls CUDA verfügbar)
+        if CUDA_AVAILABLE:
+            self._score_simple_on_gpu([
+                file_info for file_info in files
+                if 'aesthetic_score' not in file_info
+                and file_info.get('extension', '').lower() in self._VALID_EXT
+            ])
+        
         for file_info in files:
             try:
-                file_path = Path(file_info['path'])
-                score = self.score_file(file_path, file_info)
+                score = self.score_file(file_info['path'], file_info)
                 
                 if score >= self.min_score:
                     category = self.get_aesthetic_category(score)
@@ -301,9 +607,30 @@ class AestheticScorer:
         
         return categorized
     
+    def _score_simple_on_gpu(self, files: List[Dict]):
+        """Bewertet Dateien per _gpu_batch_score und merkt die Scores in file_info"""
+        for start in range(0, len(files), GPU_BATCH_SIZE):
+            loaded = []
+            for file_info in files[start:start + GPU_BATCH_SIZE]:
+                img = self._load_small(file_info['path'])
+                if img is not None:
+                    loaded.append((file_info, img))
+            if not loaded:
+                continue
+            try:
+                scores = self._gpu_batch_score([img for _, img in loaded])
+            except cv2.error as e:
+                # Rest fällt auf die Einzelbewertung (CPU) zurück
+                logger.warning(f"GPU-Bewertung fehlgeschlagen, bewerte auf der CPU: {e}")
+                return
+            for (file_info, _), score in zip(loaded, scores):
+                file_info['aesthetic_score'] = float(score)
+    
     def close(self):
         """Ressourcen freigeben"""
-        self.executor.shutdown(wait=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
     
     def __enter__(self):
         return self
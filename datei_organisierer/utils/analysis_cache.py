@@ -0,0 +1,84 @@
+"""
+Persistenter Cache für Dateianalysen (SQLite)
+"""
+
+import os
+import pickle
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+# Logging konfigurieren
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """
+    Speichert Analyseergebnisse je Datei, gültig solange Pfad, mtime und Größe gleich sind
+
+    config_key beschreibt die Einstellungen, von denen die Analyse abhängt
+    (Umbenennung, Namensschema, Ästhetik). Ändert er sich, wird der ganze
+    Cache verworfen.
+    """
+
+    def __init__(self, db_path: Path, config_key: str = ''):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+        if row is None or row[0] != config_key:
+            if row is not None:
+                logger.info("Konfiguration geändert, AnalysisCache wird geleert")
+            with self.conn:
+                self.conn.execute("DELETE FROM analysis")
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('config', ?)", (config_key,))
+
+        logger.info(f"AnalysisCache geöffnet: {db_path}")
+
+    def get(self, path: str, mtime_ns: int, size: int) -> Optional[Dict]:
+        """Liefert die gespeicherte Analyse oder None, wenn die Datei sich geändert hat"""
+        row = self.conn.execute(
+            "SELECT data FROM analysis WHERE path = ? AND mtime_ns = ? AND size = ?",
+            (path, mtime_ns, size)
+        ).fetchone()
+        if row is None:
+            return None
+
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            logger.warning(f"Cache-Eintrag für {path} unlesbar: {e}")
+            return None
+
+    def put_many(self, entries: Iterable[Tuple[str, int, int, Dict]]):
+        """Speichert (Pfad, mtime_ns, Größe, Analyse)-Einträge in einer Transaktion"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?)",
+                ((path, mtime_ns, size, pickle.dumps(info, protocol=pickle.HIGHEST_PROTOCOL))
+                 for path, mtime_ns, size, info in entries)
+            )
+
+    def prune_missing(self):
+        """Entfernt Einträge für Dateien, die nicht mehr existieren"""
+        missing = [(path,) for (path,) in self.conn.execute("SELECT path FROM analysis")
+                   if not os.path.exists(path)]
+        if missing:
+            with self.conn:
+                self.conn.executemany("DELETE FROM analysis WHERE path = ?", missing)
+
+    def close(self):
+        """Ressourcen freigeben"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -2,21 +2,43 @@
 Erweiterte Duplikaterkennung - Verbesserte Version
 """
 
+import os
 import hashlib
 import logging
+import mmap
+import pickle
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Set, Tuple, Optional
 from dataclasses import dataclass, field
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from collections import defaultdict
 import numpy as np
 
+from utils.hash_cache import HashCache
+
 try:
     import xxhash
     XXHASH_AVAILABLE = True
 except ImportError:
     XXHASH_AVAILABLE = False
 
+HASH_ALGO = 'xxh64' if XXHASH_AVAILABLE else 'md5'
+
+try:
+    from rapidfuzz import fuzz, process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    from difflib import SequenceMatcher
+    RAPIDFUZZ_AVAILABLE = False
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
 try:
     from PIL import Image, UnidentifiedImageError
     PIL_AVAILABLE = True
@@ -26,6 +48,65 @@ except ImportError:
 # Logging konfigurieren
 logger = logging.getLogger(__name__)
 
+# Ab dieser Größe wird per mmap statt read() gehasht
+MMAP_MIN_BYTES = 1 << 20
+
+# Dateianfang, der vor dem vollständigen Hash verglichen wird
+HEAD_HASH_BYTES = 64 * 1024
+
+# Anzahl gesetzter Bits je Bytewert (Popcount-Tabelle)
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# Reihenfolge, in der Gruppen eine Datei beanspruchen (kleiner = zuerst)
+SIMILARITY_PRIORITY = {'exact': 0, 'similar': 1, 'image': 2}
+
+# Zeilen pro Block beim paarweisen Hash-Vergleich (begrenzt das Zwischenarray)
+HAMMING_TILE = 256
+
+
+def _pil_gray_pixels(image_path: Path, hash_size: int) -> Optional[np.ndarray]:
+    """Graustufen-Pixel in Hash-Größe über PIL (falls OpenCV fehlt oder das Format nicht kennt)"""
+    try:
+        with Image.open(image_path) as img:
+            # JPEG: verkleinert und in Graustufen dekodieren, sonst ohne Wirkung
+            img.draft('L', (hash_size * 4, hash_size * 4))
+            img = img.convert('L')
+            
+            # Billige Reduktion um einen ganzzahligen Faktor, dann eine BOX-Mittelung auf Hash-Größe
+            factor = min(img.width, img.height) // (hash_size * 4)
+            if factor > 1:
+                img = img.reduce(factor)
+            img = img.resize((hash_size, hash_size), Image.Resampling.BOX)
+            return np.asarray(img, dtype=np.uint8).ravel()
+    except UnidentifiedImageError:
+        return None
+
+
+def _calculate_perceptual_hash(image_path: Path, hash_size: int) -> Optional[int]:
+    """Berechnet Perceptual Hash (Average Hash) für Bild als Integer (modulweit, damit picklebar)"""
+    try:
+        pixels = None
+        if CV2_AVAILABLE:
+            # Graustufen direkt beim Dekodieren, eine Flächenmittelung auf Hash-Größe
+            # (np.fromfile statt cv2.imread: auch Pfade mit Umlauten unter Windows)
+            img = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            if img is not None:
+                pixels = cv2.resize(img, (hash_size, hash_size), interpolation=cv2.INTER_AREA).ravel()
+        if pixels is None and PIL_AVAILABLE:
+            pixels = _pil_gray_pixels(image_path, hash_size)
+        
+        if pixels is None:
+            logger.warning(f"Ungültiges Bildformat: {image_path}")
+            return None
+        
+        # Bits: Pixel heller als der Durchschnitt, gepackt zu einem Integer
+        bits = pixels > pixels.mean()
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+        
+    except Exception as e:
+        logger.warning(f"Fehler bei Image-Hash von {image_path}: {e}")
+        return None
+
 
 @dataclass
 class FileMetadata:
@@ -34,9 +115,11 @@ class FileMetadata:
     filename: str
     extension: str
     size_bytes: int
-    modified: str
-    hash: Optional[str] = None
-    image_hash: Optional[str] = None
+    mtime_ns: int
+    hash: Optional[str] = None  # Hash über die ganze Datei
+    sample_hash: Optional[str] = None  # Stichproben-Hash aus der Analyse, nur als Vorfilter
+    image_hash: Optional[int] = None  # Perceptual Hash als Bitmuster (1 Bit pro Pixel)
+    index: int = -1  # Position in der an find_duplicates übergebenen Liste
     size_bucket: str = field(init=False)
     
     def __post_init__(self):
@@ -56,6 +139,25 @@ class FileMetadata:
             return "huge"
 
 
+@dataclass
+class DuplicateGroupSoA:
+    """Metadaten einer Gruppe als parallele Arrays (Zeile i gehört zu paths[i])"""
+    paths: List[Path]
+    sizes: np.ndarray      # int64, Bytes
+    mtimes_ns: np.ndarray  # int64
+    hashes: np.ndarray     # str, '' wenn unbekannt
+    
+    @classmethod
+    def from_files(cls, files: List[FileMetadata]) -> 'DuplicateGroupSoA':
+        n = len(files)
+        return cls(
+            paths=[f.path for f in files],
+            sizes=np.fromiter((f.size_bytes for f in files), dtype=np.int64, count=n),
+            mtimes_ns=np.fromiter((f.mtime_ns for f in files), dtype=np.int64, count=n),
+            hashes=np.array([f.hash or '' for f in files])
+        )
+
+
 @dataclass
 class DuplicateGroup:
     """Dataclass für Duplikat-Gruppen"""
@@ -63,30 +165,99 @@ class DuplicateGroup:
     similarity_type: str  # 'exact', 'similar', 'image'
     confidence: float
     suggested_action: str = ""
+    soa: Optional[DuplicateGroupSoA] = field(default=None, repr=False)  # passt zu files, sonst None
+    
+    def arrays(self) -> DuplicateGroupSoA:
+        """Metadaten der Gruppe als Arrays (einmal erzeugt, danach wiederverwendet)"""
+        if self.soa is None:
+            self.soa = DuplicateGroupSoA.from_files(self.files)
+        return self.soa
 
 
 class DuplicateDetector:
     def __init__(self, config: Dict):
         self.config = config
         self.similarity_threshold = config.get('similarity_threshold', 0.95)
-        self.hash_block_size = config.get('hash_block_size', 8192)
         self.image_hash_size = config.get('image_hash_size', 8)
         self.max_image_size = config.get('max_image_size', 3840 * 2160 * 3)  # 4K RGB
         
-        # Performance-Optimierung
+        # Performance-Optimierung: Threads für I/O (Datei-Hashes), Prozesse für CPU (Bild-Hashes)
         self.executor = ThreadPoolExecutor(max_workers=8)
-        self.use_cache = config.get('use_hash_cache', True)
-        self.hash_cache: Dict[Path, str] = {}
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        
+        # Hashes über Läufe hinweg merken (gültig solange mtime und Größe gleich sind)
+        self.hash_cache_path: Optional[Path] = None
+        if config.get('use_hash_cache', True) and config.get('output_dir'):
+            self.hash_cache_path = Path(config['output_dir']) / '.hash_cache.sqlite'
         
-        logger.info(f"DuplicateDetector initialisiert (XXHash: {XXHASH_AVAILABLE}, PIL: {PIL_AVAILABLE})")
+        logger.info(f"DuplicateDetector initialisiert (XXHash: {XXHASH_AVAILABLE}, "
+                    f"OpenCV: {CV2_AVAILABLE}, PIL: {PIL_AVAILABLE})")
+    
+    @property
+    def cpu_pool(self) -> ProcessPoolExecutor:
+        if self._cpu_pool is None:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self._cpu_pool
+    
+    def find_duplicates(self, files: List[Dict]) -> List[np.ndarray]:
+        """Findet Duplikate; jede Gruppe ist ein int32-Array mit Indizes in files"""
+        return [np.fromiter((f.index for f in group.files), dtype=np.int32, count=len(group.files))
+                for group in self.find_duplicate_groups(files)]
     
-    def find_duplicates(self, files: List[Dict]) -> List[DuplicateGroup]:
+    def find_duplicate_groups(self, files: List[Dict]) -> List[DuplicateGroup]:
         """Findet Duplikate mit verschiedenen Methoden (parallelisiert)"""
         logger.info(f"🔍 Suche nach Duplikaten in {len(files)} Dateien...")
         
         # Konvertiere zu FileMetadata Objekten
-        file_metas = [self._dict_to_filemeta(f) for f in files]
+        file_metas = [self._dict_to_filemeta(f, i) for i, f in enumerate(files)]
+        
+        cache = HashCache(self.hash_cache_path) if self.hash_cache_path is not None else None
+        try:
+            if cache is not None:
+                self._load_cached_hashes(cache, file_metas)
+            known = [(f.hash, f.image_hash) for f in file_metas]
+            
+            deduplicated = self._detect_groups(file_metas)
+            
+            # Neu berechnete Hashes in einer Transaktion speichern
+            if cache is not None:
+                phash_bytes = -(-self.image_hash_size ** 2 // 8)
+                cache.put_many(
+                    (str(f.path), f.mtime_ns, f.size_bytes, f.hash, HASH_ALGO,
+                     None if f.image_hash is None else f.image_hash.to_bytes(phash_bytes, 'big'),
+                     self.image_hash_size)
+                    for f, before in zip(file_metas, known)
+                    if f.mtime_ns and (f.hash, f.image_hash) != before
+                )
+        finally:
+            if cache is not None:
+                cache.close()
+        
+        logger.info(f"✅ Insgesamt {len(deduplicated)} Duplikat-Gruppen gefunden")
+        return deduplicated
+    
+    def _load_cached_hashes(self, cache: HashCache, file_metas: List[FileMetadata]):
+        """Übernimmt Hashes unveränderter Dateien aus dem persistenten Cache"""
+        hits = 0
+        for file_meta in file_metas:
+            if not file_meta.mtime_ns:
+                continue
+            entry = cache.get(str(file_meta.path), file_meta.mtime_ns, file_meta.size_bytes)
+            if entry is None:
+                continue
+            
+            file_hash, hash_algo, phash, phash_size = entry
+            if file_meta.hash is None and file_hash is not None and hash_algo == HASH_ALGO:
+                file_meta.hash = file_hash
+            if phash is not None and phash_size == self.image_hash_size:
+                file_meta.image_hash = int.from_bytes(phash, 'big')
+            hits += 1
         
+        if hits:
+            logger.info(f"  ♻️ Hashes von {hits} Dateien aus dem Cache")
+    
+    def _detect_groups(self, file_metas: List[FileMetadata]) -> List[DuplicateGroup]:
+        """Führt die Erkennungsmethoden parallel aus und fasst die Gruppen zusammen"""
         # Parallele Verarbeitung
         futures = []
         
@@ -98,9 +269,9 @@ class DuplicateDetector:
         future_similar = self.executor.submit(self.find_similar_files, file_metas)
         futures.append(('similar', future_similar))
         
-        # 3. Bild-Duplikate (nur wenn Bilder vorhanden und PIL verfügbar)
+        # 3. Bild-Duplikate (nur wenn Bilder vorhanden und OpenCV oder PIL verfügbar)
         image_files = [f for f in file_metas if f.extension.lower() in ['.jpg', '.jpeg', '.png', '.webp', '.bmp']]
-        if image_files and PIL_AVAILABLE:
+        if image_files and (CV2_AVAILABLE or PIL_AVAILABLE):
             future_image = self.executor.submit(self.find_image_duplicates, image_files)
             futures.append(('image', future_image))
         
@@ -121,79 +292,117 @@ class DuplicateDetector:
         
         # Sortiere nach Priorität
         deduplicated.sort(key=lambda g: len(g.files), reverse=True)
-        
-        logger.info(f"✅ Insgesamt {len(deduplicated)} Duplikat-Gruppen gefunden")
         return deduplicated
     
-    def _dict_to_filemeta(self, file_dict: Dict) -> FileMetadata:
+    def _dict_to_filemeta(self, file_dict: Dict, index: int = -1) -> FileMetadata:
         """Konvertiert Dictionary zu FileMetadata"""
         return FileMetadata(
             path=Path(file_dict['path']),
             filename=file_dict['filename'],
             extension=file_dict['extension'].lower(),
             size_bytes=file_dict['size_bytes'],
-            modified=file_dict.get('modified', '')
+            mtime_ns=file_dict.get('mtime_ns', 0),
+            sample_hash=file_dict.get('size_bucket_hash'),
+            index=index
         )
     
     def find_exact_duplicates(self, files: List[FileMetadata]) -> List[DuplicateGroup]:
-        """Findet exakte Duplikate (gleicher Hash) - parallelisiert"""
+        """Findet exakte Duplikate (gleiche Größe und gleicher Hash) - parallelisiert"""
         logger.info("  🔍 Berechne Datei-Hashes...")
         
-        # Parallele Hash-Berechnung
-        hash_results = {}
-        futures = {}
-        
+        # Nur Dateien mit gleicher Größe können identisch sein
+        by_size = defaultdict(list)
         for file_meta in files:
-            future = self.executor.submit(self._calculate_file_hash, file_meta.path)
-            futures[future] = file_meta
+            by_size[file_meta.size_bytes].append(file_meta)
+        size_groups = [group for group in by_size.values() if len(group) > 1]
+        candidates = [file_meta for group in size_groups for file_meta in group]
+        
+        # Vollständiger Hash nur, wo noch keiner aus dem Cache vorliegt. Große Dateien zuerst
+        # per Vorfilter vergleichen - Stichproben-Hash aus der Analyse, sonst die ersten 64 KB;
+        # verschiedener Vorfilter = keine Duplikate, gleicher wird mit dem vollen Hash bestätigt
+        to_hash = []
+        head_candidates = []
+        by_prefilter = defaultdict(list)
+        for group in size_groups:
+            unknown = [f for f in group if f.hash is None]
+            if not unknown:
+                continue
+            if len(unknown) < len(group) or group[0].size_bytes <= HEAD_HASH_BYTES:
+                to_hash.extend(unknown)
+            elif all(f.sample_hash is not None for f in group):
+                for file_meta in group:
+                    by_prefilter[(file_meta.size_bytes, 'sample', file_meta.sample_hash)].append(file_meta)
+            else:
+                head_candidates.extend(group)
         
-        for future in as_completed(futures):
-            file_meta = futures[future]
-            try:
-                file_hash = future.result(timeout=10.0)
-                file_meta.hash = file_hash
-                
-                if file_hash not in hash_results:
-                    hash_results[file_hash] = []
-                hash_results[file_hash].append(file_meta)
-            except Exception as e:
-                logger.warning(f"Hash-Berechnung für {file_meta.filename} fehlgeschlagen: {e}")
+        for file_meta, head_hash in self._hash_files(self._calculate_head_hash, head_candidates):
+            by_prefilter[(file_meta.size_bytes, 'head', head_hash)].append(file_meta)
+        to_hash.extend(f for group in by_prefilter.values() if len(group) > 1 for f in group)
+        
+        # Parallele Hash-Berechnung
+        for file_meta, file_hash in self._hash_files(self._calculate_file_hash, to_hash):
+            file_meta.hash = file_hash
+        
+        hash_results = defaultdict(list)
+        for file_meta in candidates:
+            if file_meta.hash is not None:
+                hash_results[(file_meta.size_bytes, file_meta.hash)].append(file_meta)
         
         # Erstelle DuplicateGroup Objekte
         groups = []
-        for file_hash, file_list in hash_results.items():
+        for key, file_list in hash_results.items():
             if len(file_list) > 1:
                 group = DuplicateGroup(
                     files=file_list,
                     similarity_type='exact',
                     confidence=1.0,
-                    suggested_action="Behalte neueste/kleinste Datei"
+                    suggested_action="Behalte neueste/kleinste Datei",
+                    soa=DuplicateGroupSoA.from_files(file_list)
                 )
                 groups.append(group)
         
         return groups
     
-    def _calculate_file_hash(self, file_path: Path) -> str:
-        """Berechnet Datei-Hash (mit Cache)"""
-        if self.use_cache and file_path in self.hash_cache:
-            return self.hash_cache[file_path]
+    def _hash_files(self, hash_func, files: List[FileMetadata]) -> List[Tuple[FileMetadata, str]]:
+        """Berechnet hash_func(path) für alle Dateien parallel (fehlgeschlagene werden ausgelassen)"""
+        futures = {self.executor.submit(hash_func, file_meta.path): file_meta for file_meta in files}
         
+        results = []
+        for future in as_completed(futures):
+            file_meta = futures[future]
+            try:
+                results.append((file_meta, future.result(timeout=10.0)))
+            except Exception as e:
+                logger.warning(f"Hash-Berechnung für {file_meta.filename} fehlgeschlagen: {e}")
+        
+        return results
+    
+    def _new_hasher(self):
+        """xxh64, sonst md5"""
+        return xxhash.xxh64() if XXHASH_AVAILABLE else hashlib.md5()
+    
+    def _calculate_head_hash(self, file_path: Path, n: int = HEAD_HASH_BYTES) -> str:
+        """Hash der ersten n Bytes einer Datei"""
+        hasher = self._new_hasher()
+        with open(file_path, 'rb') as f:
+            hasher.update(f.read(n))
+        return hasher.hexdigest()
+    
+    def _calculate_file_hash(self, file_path: Path) -> str:
+        """Berechnet Datei-Hash (xxh64, sonst md5)"""
         try:
-            if XXHASH_AVAILABLE:
-                hasher = xxhash.xxh64()
-            else:
-                hasher = hashlib.md5()
+            hasher = self._new_hasher()
             
             with open(file_path, 'rb') as f:
-                while chunk := f.read(self.hash_block_size):
-                    hasher.update(chunk)
-            
-            file_hash = hasher.hexdigest()
-            
-            if self.use_cache:
-                self.hash_cache[file_path] = file_hash
+                size = os.fstat(f.fileno()).st_size
+                if size >= MMAP_MIN_BYTES:
+                    # Ein update() über die gemappte Datei, keine Chunk-Kopien
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        hasher.update(mm)
+                else:
+                    hasher.update(f.read())
             
-            return file_hash
+            return hasher.hexdigest()
             
         except Exception as e:
             logger.error(f"Fehler bei Hash-Berechnung von {file_path}: {e}")
@@ -239,230 +448,230 @@ class DuplicateDetector:
         
         return groups
     
+    def _name_similarity_matrix(self, names: List[str]) -> np.ndarray:
+        """Paarweise Namensähnlichkeit (0-1) aller Namen; RapidFuzz im Batch, sonst SequenceMatcher"""
+        if RAPIDFUZZ_AVAILABLE:
+            return process.cdist(names, names, scorer=fuzz.ratio, dtype=np.float32, workers=-1) / 100.0
+        
+        n = len(names)
+        scores = np.eye(n, dtype=np.float32)
+        for i in range(n):
+            for j in range(i + 1, n):
+                scores[i, j] = scores[j, i] = SequenceMatcher(None, names[i], names[j]).ratio()
+        return scores
+    
     def _group_by_similar_names(self, files: List[FileMetadata]) -> List[List[FileMetadata]]:
-        """Gruppiert Dateien mit ähnlichen Namen (optimiert)"""
-        from difflib import SequenceMatcher
-        
-        groups = []
-        processed = set()
-        
+        """
+        Gruppiert Dateien mit ähnlichen Namen
+
+        Jeder Anker wird nur gegen die noch freien Namen hinter ihm mit passender
+        Länge verglichen (eine Zeile statt n×n-Matrix, Speicher bleibt O(n)).
+        """
         # Sortiere nach Dateinamen für bessere Gruppierung
         files_sorted = sorted(files, key=lambda x: x.filename)
+        names = [f.filename.lower() for f in files_sorted]
+        lengths = np.array([len(name) for name in names], dtype=np.int64)
+        
+        groups = []
+        processed = np.zeros(len(files_sorted), dtype=bool)
         
         for i, file1 in enumerate(files_sorted):
-            if file1.path in processed:
+            if processed[i]:
                 continue
+            processed[i] = True
             
-            current_group = [file1]
-            processed.add(file1.path)
-            
-            # Suche ähnliche Namen in der Nähe (optimiert für O(n log n))
-            for j, file2 in enumerate(files_sorted[i+1:], i+1):
-                if file2.path in processed:
-                    continue
-                
-                # Schnellprüfung: Gleiche Länge ±30%
-                len1, len2 = len(file1.filename), len(file2.filename)
-                if abs(len1 - len2) / max(len1, len2) > 0.3:
-                    continue
-                
-                # Berechne Namensähnlichkeit
-                similarity = SequenceMatcher(
-                    None, 
-                    file1.filename.lower(), 
-                    file2.filename.lower()
-                ).ratio()
-                
-                if similarity > 0.7:  # 70% ähnlich
-                    current_group.append(file2)
-                    processed.add(file2.path)
+            # Schnellprüfung: noch nicht vergeben und gleiche Länge ±30%
+            candidates = np.flatnonzero(~processed[i + 1:]) + i + 1
+            cand_lengths = lengths[candidates]
+            max_len = np.maximum(np.maximum(cand_lengths, lengths[i]), 1)
+            candidates = candidates[np.abs(cand_lengths - lengths[i]) / max_len <= 0.3]
+            if not candidates.size:
+                continue
             
-            if len(current_group) > 1:
-                groups.append(current_group)
+            # Ähnlich: > 70% Namensähnlichkeit
+            scores = self._anchor_similarities(names[i], [names[j] for j in candidates])
+            members = candidates[scores > 0.7]
+            if members.size:
+                processed[members] = True
+                groups.append([file1] + [files_sorted[j] for j in members])
         
         return groups
     
+    def _anchor_similarities(self, name: str, candidates: List[str]) -> np.ndarray:
+        """Namensähnlichkeit (0-1) eines Namens zu allen Kandidaten; Werte unter 0.7 als 0"""
+        if RAPIDFUZZ_AVAILABLE:
+            return process.cdist([name], candidates, scorer=fuzz.ratio,
+                                 dtype=np.float64, score_cutoff=70)[0] / 100.0
+        
+        return np.fromiter((SequenceMatcher(None, name, other).ratio() for other in candidates),
+                           dtype=np.float64, count=len(candidates))
+    
     def _calculate_name_similarity(self, files: List[FileMetadata]) -> float:
         """Berechnet durchschnittliche Namensähnlichkeit in einer Gruppe"""
-        from difflib import SequenceMatcher
-        
-        if len(files) < 2:
+        n = len(files)
+        if n < 2:
             return 0.0
         
-        similarities = []
-        for i in range(len(files)):
-            for j in range(i+1, len(files)):
-                similarity = SequenceMatcher(
-                    None,
-                    files[i].filename.lower(),
-                    files[j].filename.lower()
-                ).ratio()
-                similarities.append(similarity)
-        
-        return float(np.mean(similarities)) if similarities else 0.0
+        scores = self._name_similarity_matrix([f.filename.lower() for f in files])
+        return float(scores[np.triu_indices(n, k=1)].mean())
     
     def find_image_duplicates(self, files: List[FileMetadata]) -> List[DuplicateGroup]:
         """Findet visuell ähnliche Bilder (optimiert)"""
         logger.info(f"  🔍 Prüfe {len(files)} Bilder auf visuelle Ähnlichkeit...")
         
-        if not PIL_AVAILABLE:
-            logger.warning("PIL nicht verfügbar, überspringe Bild-Duplikaterkennung")
+        if not (CV2_AVAILABLE or PIL_AVAILABLE):
+            logger.warning("Weder OpenCV noch PIL verfügbar, überspringe Bild-Duplikaterkennung")
             return []
         
-        # Berechne Image Hashes parallel
-        hash_map = {}
-        futures = {}
+        # Berechne fehlende Image Hashes (nicht aus dem Cache) parallel. OpenCV gibt beim
+        # Dekodieren/Skalieren den GIL frei, dafür reicht self.executor; PIL hält ihn
+        # weitgehend, dort rechnen Prozesse, damit sich Threads nicht gegenseitig ausbremsen.
+        missing = [file_meta for file_meta in files if file_meta.image_hash is None]
+        if missing:
+            if CV2_AVAILABLE:
+                image_hashes = self._compute_image_hashes(missing, self.executor)
+            else:
+                try:
+                    image_hashes = self._compute_image_hashes(missing, self.cpu_pool)
+                except (BrokenProcessPool, pickle.PicklingError, OSError) as e:
+                    logger.warning(f"Prozess-Pool nicht nutzbar ({e}), berechne Bild-Hashes mit Threads")
+                    image_hashes = self._compute_image_hashes(missing, self.executor)
+            
+            for file_meta, img_hash in image_hashes:
+                file_meta.image_hash = img_hash
         
+        hash_map = defaultdict(list)
         for file_meta in files:
-            future = self.executor.submit(self._calculate_perceptual_hash, file_meta.path)
-            futures[future] = file_meta
+            if file_meta.image_hash is not None:
+                hash_map[file_meta.image_hash].append(file_meta)
         
-        for future in as_completed(futures):
-            file_meta = futures[future]
-            try:
-                img_hash = future.result(timeout=5.0)
-                if img_hash:
-                    file_meta.image_hash = img_hash
-                    
-                    if img_hash not in hash_map:
-                        hash_map[img_hash] = []
-                    hash_map[img_hash].append(file_meta)
-            except Exception as e:
-                logger.warning(f"Image-Hash für {file_meta.filename} fehlgeschlagen: {e}")
-        
-        # Finde ähnliche Hashes mit optimiertem Algorithmus
+        # Finde ähnliche Hashes (Hamming-Distanz < 8) über einen Multi-Index:
+        # Hash in 8 gleich breite Segmente teilen - liegen zwei Hashes weniger als 8 Bit
+        # auseinander, stimmt mindestens ein Segment exakt überein (Schubfachprinzip)
         groups = []
         hash_list = list(hash_map.items())
+        hash_bits = -(-self.image_hash_size ** 2 // 8) * 8  # Länge nach np.packbits
+        seg_bits = hash_bits // 8
+        seg_mask = (1 << seg_bits) - 1
         
-        # Verwende optimierte Suche mit Hash-Buckets
-        hash_buckets = defaultdict(list)
-        for hash_str, file_list in hash_list:
-            # Erstelle Buckets basierend auf Hash-Präfixen für schnellere Suche
-            bucket_key = hash_str[:8]  # Erste 8 Zeichen
-            hash_buckets[bucket_key].append((hash_str, file_list))
+        segment_index = [defaultdict(list) for _ in range(8)]
+        for i, (img_hash, _) in enumerate(hash_list):
+            for seg, index in enumerate(segment_index):
+                index[(img_hash >> (seg * seg_bits)) & seg_mask].append(i)
         
-        processed_hashes = set()
+        processed = [False] * len(hash_list)
         
-        for bucket_key, bucket_items in hash_buckets.items():
-            for i, (hash1, files1) in enumerate(bucket_items):
-                if hash1 in processed_hashes:
+        for i, (hash1, files1) in enumerate(hash_list):
+            if processed[i]:
+                continue
+            
+            current_group = files1.copy()
+            processed[i] = True
+            
+            # Kandidaten: alle Hashes mit mindestens einem gleichen Segment
+            candidates = set()
+            for seg, index in enumerate(segment_index):
+                candidates.update(index[(hash1 >> (seg * seg_bits)) & seg_mask])
+            
+            for j in sorted(candidates):
+                if processed[j]:
                     continue
                 
-                current_group = files1.copy()
-                processed_hashes.add(hash1)
-                
-                # Vergleiche nur mit Hashes im selben Bucket
-                for j, (hash2, files2) in enumerate(bucket_items[i+1:], i+1):
-                    if hash2 in processed_hashes:
-                        continue
-                    
-                    # Berechne Hamming-Distanz
-                    if self._hamming_distance(hash1, hash2) < 8:  # Ähnlich
-                        current_group.extend(files2)
-                        processed_hashes.add(hash2)
+                hash2, files2 = hash_list[j]
+                if self._hamming_distance(hash1, hash2) < 8:  # Ähnlich
+                    current_group.extend(files2)
+                    processed[j] = True
+            
+            if len(current_group) > len(files1):
+                # Berechne durchschnittliche Ähnlichkeit
+                avg_similarity = 1.0 - (self._avg_hamming_distance(current_group) / 64.0)
                 
-                if len(current_group) > len(files1):
-                    # Berechne durchschnittliche Ähnlichkeit
-                    avg_similarity = 1.0 - (self._avg_hamming_distance(current_group) / 64.0)
-                    
-                    group = DuplicateGroup(
-                        files=current_group,
-                        similarity_type='image',
-                        confidence=avg_similarity,
-                        suggested_action="Behalte beste Qualität (höchste Auflösung)"
-                    )
-                    groups.append(group)
+                group = DuplicateGroup(
+                    files=current_group,
+                    similarity_type='image',
+                    confidence=avg_similarity,
+                    suggested_action="Behalte beste Qualität (höchste Auflösung)"
+                )
+                groups.append(group)
         
         return groups
     
-    def _calculate_perceptual_hash(self, image_path: Path) -> Optional[str]:
-        """Berechnet Perceptual Hash für Bild"""
-        if not PIL_AVAILABLE:
-            return None
+    def _compute_image_hashes(self, files: List[FileMetadata],
+                              executor) -> List[Tuple[FileMetadata, int]]:
+        """Berechnet die Perceptual Hashes auf dem gegebenen Executor"""
+        futures = {executor.submit(_calculate_perceptual_hash, file_meta.path, self.image_hash_size): file_meta
+                   for file_meta in files}
         
-        try:
-            with Image.open(image_path) as img:
-                # Größe begrenzen für Performance
-                max_size = (512, 512)
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Reduziere Größe für Hash
-                img = img.resize((self.image_hash_size, self.image_hash_size), 
-                               Image.Resampling.LANCZOS)
-                
-                # Konvertiere zu Graustufen
-                img = img.convert('L')
-                
-                # Berechne Durchschnitt
-                pixels = list(img.getdata())
-                avg = sum(pixels) / len(pixels)
-                
-                # Erstelle Hash
-                hash_str = ''.join('1' if pixel > avg else '0' for pixel in pixels)
-                
-                return hash_str
-                
-        except UnidentifiedImageError:
-            logger.warning(f"Ungültiges Bildformat: {image_path}")
-            return None
-        except Exception as e:
-            logger.warning(f"Fehler bei Image-Hash von {image_path}: {e}")
-            return None
-    
-    def _hamming_distance(self, hash1: str, hash2: str) -> int:
-        """Berechnet Hamming-Distanz zwischen zwei Hashes"""
-        if len(hash1) != len(hash2):
-            return len(hash1)  # Maximale Distanz
+        results = []
+        for future in as_completed(futures):
+            file_meta = futures[future]
+            try:
+                img_hash = future.result(timeout=5.0)
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                logger.warning(f"Image-Hash für {file_meta.filename} fehlgeschlagen: {e}")
+                continue
+            if img_hash is not None:
+                results.append((file_meta, img_hash))
         
-        return sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
+        return results
+    
+    def _hamming_distance(self, hash1: int, hash2: int) -> int:
+        """Berechnet Hamming-Distanz zwischen zwei Hashes (XOR + Popcount)"""
+        return (hash1 ^ hash2).bit_count()
     
     def _avg_hamming_distance(self, files: List[FileMetadata]) -> float:
-        """Berechnet durchschnittliche Hamming-Distanz in einer Gruppe"""
-        if len(files) < 2:
+        """Berechnet durchschnittliche Hamming-Distanz in einer Gruppe (vektorisiert über alle Paare)"""
+        hashes = [f.image_hash for f in files if f.image_hash is not None]
+        n = len(hashes)
+        if n < 2:
             return 0.0
         
-        distances = []
-        hashes = [f.image_hash for f in files if f.image_hash]
+        # Hashes als (n, Bytes)-Matrix
+        n_bytes = max(1, -(-max(h.bit_length() for h in hashes) // 8))
+        packed = np.frombuffer(b''.join(h.to_bytes(n_bytes, 'big') for h in hashes),
+                               dtype=np.uint8).reshape(n, n_bytes)
         
-        for i in range(len(hashes)):
-            for j in range(i+1, len(hashes)):
-                dist = self._hamming_distance(hashes[i], hashes[j])
-                distances.append(dist)
+        # Paarweise XOR + Popcount blockweise, nur oberes Dreieck (j > i) zählen
+        total = 0
+        for start in range(0, n, HAMMING_TILE):
+            block = packed[start:start + HAMMING_TILE]
+            dist = _POPCOUNT8[block[:, None, :] ^ packed[None, :, :]].sum(axis=-1, dtype=np.int64)
+            total += int(np.triu(dist, k=start + 1).sum())
         
-        return float(np.mean(distances)) if distances else 0.0
+        return total / (n * (n - 1) / 2)
     
     def deduplicate_groups(self, groups: List[DuplicateGroup]) -> List[DuplicateGroup]:
-        """Entfernt doppelte Dateien aus Gruppen"""
-        file_to_groups = defaultdict(list)
+        """Entfernt doppelte Dateien aus Gruppen (jede Datei bleibt in ihrer besten Gruppe)"""
+        # Exakte vor ähnlichen vor Bild-Gruppen, innerhalb eines Typs höchste Konfidenz zuerst
+        groups = sorted(groups, key=lambda g: (SIMILARITY_PRIORITY.get(g.similarity_type, len(SIMILARITY_PRIORITY)),
+                                               -g.confidence))
         
-        # Map: Datei → Gruppen Index
-        for i, group in enumerate(groups):
-            for file_meta in group.files:
-                file_to_groups[file_meta.path].append(i)
-        
-        # Entferne Duplikate
         processed_files = set()
         result = []
         
-        for i, group in enumerate(groups):
-            clean_group = []
-            
-            for file_meta in group.files:
-                if file_meta.path not in processed_files:
-                    clean_group.append(file_meta)
-                    processed_files.add(file_meta.path)
+        for group in groups:
+            clean_group = [f for f in group.files if f.path not in processed_files]
+            processed_files.update(f.path for f in clean_group)
             
             if len(clean_group) > 1:
-                # Aktualisiere Konfidenz für die bereinigte Gruppe
-                if group.similarity_type == 'image' and clean_group[0].image_hash:
-                    avg_similarity = 1.0 - (self._avg_hamming_distance(clean_group) / 64.0)
-                    group.confidence = avg_similarity
+                # Konfidenz nur neu berechnen, wenn die Gruppe kleiner geworden ist
+                if (len(clean_group) < len(group.files) and group.similarity_type == 'image'
+                        and clean_group[0].image_hash is not None):
+                    group.confidence = 1.0 - (self._avg_hamming_distance(clean_group) / 64.0)
                 
+                if len(clean_group) < len(group.files):
+                    group.soa = None
                 group.files = clean_group
                 result.append(group)
         
         return result
     
+    def _format_date(self, mtime_ns: int) -> str:
+        """Datum (JJJJ-MM-TT) aus einem Zeitstempel in Nanosekunden"""
+        return datetime.fromtimestamp(mtime_ns / 1e9).strftime('%Y-%m-%d') if mtime_ns else ''
+    
     def suggest_duplicate_handling(self, duplicate_groups: List[DuplicateGroup]) -> Dict:
         """Schlägt Behandlung von Duplikaten vor"""
         suggestions = {}
@@ -471,17 +680,12 @@ class DuplicateDetector:
             if len(group.files) < 2:
                 continue
             
-            # Analysiere Gruppe
-            files_sorted_by_date = sorted(group.files, 
-                                        key=lambda x: x.modified, 
-                                        reverse=True)
-            files_sorted_by_size = sorted(group.files, 
-                                        key=lambda x: x.size_bytes, 
-                                        reverse=True)
-            
-            newest = files_sorted_by_date[0]
-            largest = files_sorted_by_size[0]
-            smallest = files_sorted_by_size[-1]
+            # Analysiere Gruppe (Extremwerte direkt auf den Arrays)
+            soa = group.arrays()
+            newest = group.files[int(np.argmax(soa.mtimes_ns))]
+            oldest = group.files[int(np.argmin(soa.mtimes_ns))]
+            largest = group.files[int(np.argmax(soa.sizes))]
+            smallest = group.files[int(np.argmin(soa.sizes))]
             
             # Bestimme beste Qualität für Bilder
             if group.similarity_type == 'image':
@@ -506,7 +710,7 @@ class DuplicateDetector:
                 "recommended": f"Behalte {best_quality.filename}",
                 "stats": {
                     "size_range": f"{smallest.size_bytes/1024:.1f}KB - {largest.size_bytes/1024:.1f}KB",
-                    "age_range": f"{files_sorted_by_date[-1].modified[:10]} - {newest.modified[:10]}"
+                    "age_range": f"{self._format_date(oldest.mtime_ns)} - {self._format_date(newest.mtime_ns)}"
                 }
             }
         
@@ -515,7 +719,9 @@ class DuplicateDetector:
     def close(self):
         """Ressourcen freigeben"""
         self.executor.shutdown(wait=True)
-        self.hash_cache.clear()
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=True)
+            self._cpu_pool = None
     
     def __enter__(self):
         return self
@@ -7,6 +7,10 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 
+# Einmal beim Import kompiliert statt bei jedem Aufruf
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s-]')
+_MULTI_UNDERSCORE_RE = re.compile(r'_+')
+
 class FilenameGenerator:
     def __init__(self, config: Dict):
         self.config = config
@@ -180,13 +184,13 @@ class FilenameGenerator:
     def clean_for_filename(self, text: str) -> str:
         """Bereinigt Text für Dateinamen"""
         # Entferne Sonderzeichen
-        text = re.sub(r'[^\w\s-]', '', text)
+        text = _SPECIAL_CHARS_RE.sub('', text)
         
         # Ersetze Leerzeichen mit Unterstrichen
         text = text.replace(' ', '_')
         
         # Entferne doppelte Unterstriche
-        text = re.sub(r'_+', '_', text)
+        text = _MULTI_UNDERSCORE_RE.sub('_', text)
         
         # Kürze wenn nötig
         if len(text) > 40:
@@ -196,10 +200,10 @@ class FilenameGenerator:
     
     def generate_timestamp_name(self, file_info: Dict, extension: str) -> str:
         """Generiert Namen mit Zeitstempel"""
-        modified = file_info.get('modified', datetime.now().isoformat())
+        mtime_ns = file_info.get('mtime_ns')
         
         try:
-            dt = datetime.fromisoformat(modified.replace('Z', '+00:00'))
+            dt = datetime.fromtimestamp(mtime_ns / 1e9) if mtime_ns else datetime.now()
             timestamp = dt.strftime("%Y%m%d_%H%M%S")
         except:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -0,0 +1,64 @@
+"""
+Persistenter Cache für Datei- und Bild-Hashes (SQLite)
+"""
+
+import os
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+# Logging konfigurieren
+logger = logging.getLogger(__name__)
+
+# (Datei-Hash, Hash-Algorithmus, Perceptual Hash, Perceptual-Hash-Größe)
+HashEntry = Tuple[Optional[str], Optional[str], Optional[bytes], Optional[int]]
+
+
+class HashCache:
+    """Speichert Hashes je Datei, gültig solange Pfad, mtime und Größe gleich sind"""
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        # WAL: Lesen aus anderen Prozessen blockiert das Schreiben nicht
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "file_hash TEXT, hash_algo TEXT, phash BLOB, phash_size INTEGER)"
+        )
+
+        logger.info(f"HashCache geöffnet: {db_path}")
+
+    def get(self, path: str, mtime_ns: int, size: int) -> Optional[HashEntry]:
+        """Liefert die gespeicherten Hashes oder None, wenn die Datei sich geändert hat"""
+        return self.conn.execute(
+            "SELECT file_hash, hash_algo, phash, phash_size FROM hashes "
+            "WHERE path = ? AND mtime_ns = ? AND size = ?",
+            (path, mtime_ns, size)
+        ).fetchone()
+
+    def put_many(self, entries: Iterable[Tuple[str, int, int, Optional[str], Optional[str],
+                                               Optional[bytes], Optional[int]]]):
+        """Speichert (Pfad, mtime_ns, Größe, Hash, Algorithmus, pHash, pHash-Größe) in einer Transaktion"""
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)", entries)
+
+    def prune_missing(self):
+        """Entfernt Einträge für Dateien, die nicht mehr existieren"""
+        missing = [(path,) for (path,) in self.conn.execute("SELECT path FROM hashes")
+                   if not os.path.exists(path)]
+        if missing:
+            with self.conn:
+                self.conn.executemany("DELETE FROM hashes WHERE path = ?", missing)
+
+    def close(self):
+        """Ressourcen freigeben"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -8,7 +8,7 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, TypedDict
 from dataclasses import dataclass, field
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import colorsys
 from collections import Counter
 import time
@@ -197,6 +197,21 @@ class ImageAnalyzer:
                 result.error = "Bild konnte nicht geladen werden"
                 return result
             
+            return self._analyze_loaded(image_path, img, start_time)
+            
+        except Exception as e:
+            logger.error(f"Fehler bei Bildanalyse von {image_path}: {e}")
+            result.error = str(e)
+            result.processing_time = time.time() - start_time
+            return result
+    
+    def _analyze_loaded(self, image_path: Path, img: np.ndarray, start_time: float,
+                        objects: Optional[List[str]] = None) -> ImageAnalysisResult:
+        """Analysiert ein bereits geladenes Bild (objects: bereits erkannte Objekte, z.B. aus einem Batch)"""
+        result = ImageAnalysisResult(success=False)
+        cache_key = str(image_path)
+        
+        try:
             # Grundlegende Informationen
             height, width, channels = img.shape
             result.dimensions = (width, height)
@@ -210,12 +225,13 @@ class ImageAnalyzer:
             analysis_futures['dominant'] = self.executor.submit(self._get_dominant_colors_parallel, img)
             
             # Qualitätsmetriken
-            analysis_futures['brightness'] = self.executor.submit(self._get_brightness, img)
-            analysis_futures['contrast'] = self.executor.submit(self._get_contrast, img)
+            analysis_futures['brightness_contrast'] = self.executor.submit(self._get_brightness_contrast, img)
             analysis_futures['sharpness'] = self.executor.submit(self._calculate_sharpness, img)
             
-            # Objekterkennung (falls aktiviert)
-            if self.yolo_model:
+            # Objekterkennung (falls aktiviert und nicht schon im Batch erfolgt)
+            if objects is not None:
+                result.objects = objects
+            elif self.yolo_model:
                 analysis_futures['objects'] = self.executor.submit(self._detect_objects_parallel, img)
             
             # Gesichtserkennung (falls aktiviert)
@@ -226,13 +242,18 @@ class ImageAnalyzer:
             for key, future in analysis_futures.items():
                 try:
                     value = future.result(timeout=5.0)
-                    setattr(result, key, value)
+                    if key == 'brightness_contrast':
+                        result.brightness, result.contrast = value
+                    else:
+                        setattr(result, key, value)
                 except Exception as e:
                     logger.warning(f"Analyse {key} fehlgeschlagen: {e}")
                     if key == 'objects':
                         result.objects = []
                     elif key == 'faces':
                         result.faces = 0
+                    elif key == 'brightness_contrast':
+                        result.brightness, result.contrast = 0.0, 0.0
                     else:
                         setattr(result, key, 0.0 if key in ['brightness', 'contrast', 'sharpness'] else {})
             
@@ -440,30 +461,23 @@ class ImageAnalyzer:
         
         return closest_name
     
-    def _get_brightness(self, img: np.ndarray) -> float:
-        """Berechnet die Helligkeit des Bildes"""
+    def _get_brightness_contrast(self, img: np.ndarray) -> Tuple[float, float]:
+        """Berechnet Helligkeit und Kontrast des Bildes (ein Durchlauf über die Graustufen)"""
         try:
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            brightness = np.mean(gray) / 255.0
-            return float(np.clip(brightness, 0.0, 1.0))
+            mean, stddev = cv2.meanStdDev(gray)
+            return float(mean[0, 0]) / 255.0, float(stddev[0, 0]) / 255.0
         except:
-            return 0.5
-    
-    def _get_contrast(self, img: np.ndarray) -> float:
-        """Berechnet den Kontrast des Bildes"""
-        try:
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            contrast = gray.std() / 255.0
-            return float(np.clip(contrast, 0.0, 1.0))
-        except:
-            return 0.5
+            return 0.5, 0.5
     
     def _calculate_sharpness(self, img: np.ndarray) -> float:
         """Berechnet die Schärfe des Bildes (Laplace Variance)"""
         try:
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-            variance = laplacian.var()
+            # Ganzzahlig in CV_16S (statt 8 Byte/Pixel in CV_64F), Varianz in einem Durchlauf
+            laplacian = cv2.Laplacian(gray, cv2.CV_16S)
+            _, stddev = cv2.meanStdDev(laplacian)
+            variance = stddev[0, 0] ** 2
             
             # Normalisiere (empirische Werte)
             sharpness = min(1.0, variance / 1000.0)
@@ -479,30 +493,42 @@ class ImageAnalyzer:
         try:
             # YOLO ausführen
             results = self.yolo_model(img, verbose=False, conf=0.25)
-            
-            # Extrahiere erkannte Objekte
-            objects = []
-            for result in results:
-                if result.boxes is not None:
-                    for box in result.boxes:
-                        class_id = int(box.cls[0])
-                        confidence = float(box.conf[0])
-                        
-                        # Nur Objekte mit ausreichender Konfidenz
-                        if confidence > 0.5 and class_id in self.yolo_classes:
-                            class_name = self.yolo_classes[class_id]
-                            objects.append(class_name)
-            
-            # Einzigartige Objekte, sortiert nach Häufigkeit
-            object_counts = Counter(objects)
-            sorted_objects = [obj for obj, _ in object_counts.most_common(10)]
-            
-            return sorted_objects
+            return self._extract_objects(results)
             
         except Exception as e:
             logger.warning(f"Objekterkennung fehlgeschlagen: {e}")
             return []
     
+    def _detect_objects_batch(self, imgs: List[np.ndarray], batch_size: int) -> List[Optional[List[str]]]:
+        """Erkennt Objekte in mehreren Bildern mit einem YOLO-Aufruf (None = einzeln nachholen)"""
+        if self.yolo_model is None or not imgs:
+            return [None] * len(imgs)
+        
+        try:
+            results = self.yolo_model.predict(imgs, batch=batch_size, verbose=False, conf=0.25)
+            return [self._extract_objects([result]) for result in results]
+        except Exception as e:
+            logger.warning(f"Batch-Objekterkennung fehlgeschlagen, erkenne einzeln: {e}")
+            return [None] * len(imgs)
+    
+    def _extract_objects(self, results) -> List[str]:
+        """Extrahiert erkannte Objekte aus YOLO-Ergebnissen"""
+        objects = []
+        for result in results:
+            if result.boxes is not None:
+                for box in result.boxes:
+                    class_id = int(box.cls[0])
+                    confidence = float(box.conf[0])
+                    
+                    # Nur Objekte mit ausreichender Konfidenz
+                    if confidence > 0.5 and class_id in self.yolo_classes:
+                        class_name = self.yolo_classes[class_id]
+                        objects.append(class_name)
+        
+        # Einzigartige Objekte, sortiert nach Häufigkeit
+        object_counts = Counter(objects)
+        return [obj for obj, _ in object_counts.most_common(10)]
+    
     def _detect_faces_parallel(self, img: np.ndarray) -> int:
         """Erkennt Gesichter (parallel)"""
         if self.face_cascade is None:
@@ -600,31 +626,38 @@ class ImageAnalyzer:
         
         self.image_cache[cache_key] = result
     
-    def analyze_images_batch(self, image_paths: List[Path]) -> Dict[Path, ImageAnalysisResult]:
-        """Analysiert mehrere Bilder parallel"""
+    def analyze_images_batch(self, image_paths: List[Path],
+                             batch_size: int = 32) -> Dict[Path, ImageAnalysisResult]:
+        """Analysiert mehrere Bilder (Laden parallel, Objekterkennung als ein YOLO-Batch)"""
         results = {}
-        futures = {}
         
         logger.info(f"Analysiere {len(image_paths)} Bilder im Batch...")
         
-        # Starte alle Analysen parallel
+        # Bereits analysierte Bilder aus dem Cache
+        to_load = []
         for image_path in image_paths:
-            future = self.executor.submit(self.analyze_image, image_path)
-            futures[future] = image_path
+            cached_result = self.image_cache.get(str(image_path))
+            if cached_result is not None:
+                results[image_path] = cached_result
+            else:
+                to_load.append(image_path)
         
-        # Sammle Ergebnisse
-        for future in as_completed(futures):
-            image_path = futures[future]
-            try:
-                result = future.result(timeout=10.0)
-                results[image_path] = result
-            except Exception as e:
-                logger.warning(f"Batch-Analyse für {image_path} fehlgeschlagen: {e}")
+        # Bilder parallel laden
+        loaded = []
+        for image_path, img in zip(to_load, self.executor.map(self._load_image, to_load)):
+            if img is None:
                 results[image_path] = ImageAnalysisResult(
                     success=False,
-                    error=str(e),
+                    error="Bild konnte nicht geladen werden",
                     description="Analyse fehlgeschlagen"
                 )
+            else:
+                loaded.append((image_path, img))
+        
+        # Objekterkennung für alle Bilder auf einmal, Rest pro Bild
+        batch_objects = self._detect_objects_batch([img for _, img in loaded], batch_size)
+        for (image_path, img), objects in zip(loaded, batch_objects):
+            results[image_path] = self._analyze_loaded(image_path, img, time.time(), objects)
         
         logger.info(f"Batch-Analyse abgeschlossen: {len(results)} Ergebnisse")
         return results